@@ -0,0 +1,314 @@
+from functools import lru_cache
+
+import numpy as np
+
+
+class Analysis:
+    """Spectral analysis of stimuli and recordings. Only depends on NumPy and
+    SciPy, so it can be used and benchmarked without Qt. SciPy is imported on
+    first use, as importing scipy.signal takes about a second."""
+
+    @staticmethod
+    def slice_interval(
+        data: np.ndarray, fs: int, start: int = 0, stop: int = -1
+    ) -> np.ndarray:
+        """Part of `data` between `start` and `stop` (in ms) as a view. A
+        negative `stop` means the end of `data`."""
+        start_frame = max(0, int(start * fs / 1000))
+        if stop < 0:
+            return data[start_frame:]
+        return data[start_frame : int(stop * fs / 1000)]
+
+    # Longest window that is cached, at most 512 KiB each. Longer windows are
+    # as long as an analysed interval, which changes with every selection.
+    max_cached_window: int = 2**16
+
+    @staticmethod
+    def get_window(window: str, length: int) -> np.ndarray:
+        """Symmetric analysis window of `length` frames. Windows are read-only,
+        so they must not be modified; short ones are cached."""
+        if length <= Analysis.max_cached_window:
+            return Analysis._cached_window(window, length)
+        return Analysis._window(window, length)
+
+    @staticmethod
+    @lru_cache(maxsize=32)
+    def _cached_window(window: str, length: int) -> np.ndarray:
+        return Analysis._window(window, length)
+
+    @staticmethod
+    def _window(window: str, length: int) -> np.ndarray:
+        from scipy import signal
+
+        data = signal.windows.get_window(window, length, fftbins=False)
+        data.flags.writeable = False
+
+        return data
+
+    @staticmethod
+    def spectrum(
+        data: np.ndarray, fs: int, window: str = "boxcar"
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Frequencies and magnitudes of the real FFT of `data` multiplied
+        with `window`. `data` is zero-padded to the next fast FFT length."""
+        from scipy import fft
+
+        if len(data) == 0:
+            return np.zeros(0), np.zeros(0)
+
+        if window != "boxcar":
+            data = data * Analysis.get_window(window, len(data))
+        length = fft.next_fast_len(len(data), real=True)
+
+        return (
+            fft.rfftfreq(length, 1 / fs),
+            np.abs(fft.rfft(data, length)),
+        )
+
+    @staticmethod
+    def windowed_spectrum(
+        data: np.ndarray, fs: int, window: str = "hann"
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Like `spectrum`, but windowed with `window` by default and with the
+        magnitudes normalised by half the length of `data`."""
+        frequencies, magnitudes = Analysis.spectrum(data, fs, window)
+        if len(data) > 1:
+            magnitudes /= len(data) // 2
+
+        return frequencies, magnitudes
+
+    @staticmethod
+    def preview_spectrum(
+        data: np.ndarray,
+        fs: int,
+        window: str = "hann",
+        frames: int = 8,
+        length: int = 4096,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Cheap estimate of `windowed_spectrum` for interactive previews: the
+        power average of `frames` spectra of `length` frames, spread evenly
+        over `data`. Short `data` gets the exact spectrum instead."""
+        from scipy import fft
+
+        if len(data) <= frames * length:
+            return Analysis.windowed_spectrum(data, fs, window)
+
+        starts = np.linspace(0, len(data) - length, frames).astype(int)
+        segments = data[starts[:, np.newaxis] + np.arange(length)]
+        spectra = fft.rfft(segments * Analysis.get_window(window, length), axis=1)
+        power = np.mean(np.abs(spectra) ** 2, axis=0)
+
+        return fft.rfftfreq(length, 1 / fs), np.sqrt(power) / (length // 2)
+
+    @staticmethod
+    @lru_cache(maxsize=16)
+    def fractional_octave_edges(length: int, fs: int, fraction: int) -> np.ndarray:
+        """Indices into the rfft of `length` frames at which bands of
+        1/`fraction` octave (aligned to 1 kHz) start, plus the end index. Bands
+        narrower than a bin are merged, so the lowest bands are single bins.
+        The DC bin is left out. Edges are cached and read-only."""
+        resolution = fs / length
+        bins = length // 2 + 1
+        lowest = int(np.floor(fraction * np.log2(resolution / 1000)))
+        highest = int(np.ceil(fraction * np.log2(fs / 2 / 1000)))
+        upper = 1000 * 2 ** ((np.arange(lowest, highest + 1) + 0.5) / fraction)
+        edges = np.unique(
+            np.concatenate(
+                [[1], np.clip(np.ceil(upper / resolution).astype(int), 1, bins)]
+            )
+        )
+        edges.flags.writeable = False
+
+        return edges
+
+    @staticmethod
+    def reduce_spectrum(
+        frequencies: np.ndarray, magnitudes: np.ndarray, fs: int, fraction: int
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Combines a spectrum from `spectrum` into bands of 1/`fraction`
+        octave, so that plotting only needs a few points per band. Returns
+        the centre frequency and the level (root of the summed power) of
+        every band."""
+        if len(frequencies) < 2:
+            return np.zeros(0), np.zeros(0)
+
+        length = int(round(fs / frequencies[1]))
+        edges = Analysis.fractional_octave_edges(length, fs, fraction)
+        levels = np.sqrt(np.add.reduceat(magnitudes**2, edges[:-1]))
+        centres = np.sqrt(frequencies[edges[:-1]] * frequencies[edges[1:] - 1])
+
+        return centres, levels
+
+    # Length in ms of the stimulus from its first sound that latency estimates
+    # correlate. The delay is found at the start of the stimulus already, and
+    # the rest of a long recording would only make the FFT slower.
+    latency_window: int = 2000
+
+    @staticmethod
+    def onset(data: np.ndarray) -> int:
+        """Index of the first non-zero sample of `data`, 0 if there is none."""
+        return int(np.argmax(data != 0))
+
+    @staticmethod
+    def estimate_latency(
+        reference: np.ndarray,
+        recorded: np.ndarray,
+        max_lag: int | None = None,
+        frames: int | None = None,
+    ) -> int:
+        """Delay in frames at which `reference` appears in `recorded`, found
+        as the maximum of their cross-correlation, which is computed by FFT.
+        Only delays up to `max_lag` are considered. With `frames`, only that
+        many frames of `reference` from its onset are correlated."""
+        from scipy import fft
+
+        if max_lag is None or max_lag >= len(recorded):
+            max_lag = len(recorded) - 1
+        if frames is not None:
+            start = Analysis.onset(reference)
+            reference = reference[start : start + frames]
+            recorded = recorded[start : start + len(reference) + max_lag]
+        if not len(reference) or not len(recorded):
+            return 0
+        max_lag = max(0, min(max_lag, len(recorded) - 1))
+
+        length = fft.next_fast_len(len(reference) + len(recorded) - 1, real=True)
+        correlation = fft.irfft(
+            fft.rfft(recorded, length) * np.conj(fft.rfft(reference, length)),
+            length,
+        )
+
+        # The absolute value also finds an inverted recording.
+        return int(np.argmax(np.abs(correlation[: max_lag + 1])))
+
+    @staticmethod
+    def latency_correlation(
+        reference: np.ndarray,
+        recorded: np.ndarray,
+        latency: int,
+        frames: int | None = None,
+    ) -> float:
+        """Normalised correlation of `reference` and `recorded` delayed by
+        `latency`, from 0 to 1. Close to 1 if `reference` is clearly found
+        there, close to 0 if `recorded` is silence or noise. `frames` limits
+        `reference` as in `estimate_latency`."""
+        if frames is not None:
+            start = Analysis.onset(reference)
+            reference = reference[start : start + frames]
+            recorded = recorded[start:]
+        segment = recorded[latency : latency + len(reference)]
+        norm = np.linalg.norm(reference[: len(segment)]) * np.linalg.norm(segment)
+        if not norm:
+            return 0.0
+
+        return float(abs(np.dot(reference[: len(segment)], segment)) / norm)
+
+    @staticmethod
+    def step_response(
+        data: np.ndarray, fs: int, steps: list[tuple[float, int, int]]
+    ) -> np.ndarray:
+        """Amplitude and phase of `data` at the frequency of every step, by
+        lock-in detection over the step's frame range. Each range is cut to a
+        whole number of periods to avoid leakage. The phase (in rad) is
+        relative to a sine starting at the range start, as the stimulus tone
+        does at the start of its plateau.
+
+        Returns rows of frequency, amplitude and phase; steps outside of
+        `data` or shorter than one period are NaN."""
+        response = np.full((len(steps), 3), np.nan)
+        for row, (hertz, start, stop) in enumerate(steps):
+            response[row, 0] = hertz
+            segment = data[max(0, start) : min(stop, len(data))]
+            periods = int(len(segment) * hertz / fs)
+            if start < 0 or stop > len(data) or periods < 1 or hertz <= 0:
+                continue
+
+            segment = segment[: int(round(periods * fs / hertz))]
+            phase = np.arange(len(segment)) * (2 * np.pi * hertz / fs)
+            # Correlating with sin and cos yields the complex amplitude.
+            real = np.dot(segment, np.sin(phase))
+            imag = np.dot(segment, np.cos(phase))
+            response[row, 1] = 2 * np.hypot(real, imag) / len(segment)
+            response[row, 2] = np.arctan2(imag, real)
+
+        return response
+
+    @staticmethod
+    @lru_cache(maxsize=8)
+    def sweep(method: str, duration: int, f0: float, f1: float, fs: int) -> np.ndarray:
+        """Calibration sweep from `f0` to `f1` Hz over `duration` ms, see
+        scipy.signal.chirp. Sweeps are cached and read-only."""
+        from scipy import signal
+
+        data = signal.chirp(
+            np.linspace(0, duration / 1000, fs * duration // 1000),
+            f0=f0,
+            t1=duration / 1000,
+            f1=f1,
+            method=method,
+        )
+        data.flags.writeable = False
+
+        return data
+
+    @staticmethod
+    @lru_cache(maxsize=8)
+    def inverse_sweep(
+        method: str, duration: int, f0: float, f1: float, fs: int
+    ) -> tuple[int, np.ndarray]:
+        """FFT length and spectrum of the inverse filter of a sweep, so that a
+        recording of the sweep only needs one FFT and one multiplication to be
+        deconvolved. The FFT length leaves room for the sweep plus one second.
+
+        The logarithmic sweep uses Farina's method: the time-reversed sweep,
+        attenuated by 6 dB per octave. All other sweeps use a spectral division
+        that is regularised outside of [f0, f1]."""
+        from scipy import fft
+
+        data = Analysis.sweep(method, duration, f0, f1, fs)
+        length = fft.next_fast_len(2 * len(data) + fs, real=True)
+        frequencies = fft.rfftfreq(length, 1 / fs)
+        band = (frequencies >= min(f0, f1)) & (frequencies <= max(f0, f1))
+        spectrum = fft.rfft(data, length)
+
+        if method == "logarithmic":
+            time = np.arange(len(data)) / fs
+            envelope = np.exp(-time * np.log(f1 / f0) / (duration / 1000))
+            inverse = fft.rfft(data[::-1] * envelope, length)
+        else:
+            power = np.abs(spectrum) ** 2
+            # Relative to the local power within the band, as the power of
+            # a hyperbolic sweep falls by about 40 dB from f0 to f1.
+            regularisation = np.where(band, 1e-3 * power, power.max())
+            inverse = np.conj(spectrum) / (power + regularisation)
+
+        # Unity gain within the band of the sweep.
+        inverse /= np.mean(np.abs(spectrum[band] * inverse[band]))
+        inverse.flags.writeable = False
+
+        return length, inverse
+
+    @staticmethod
+    def deconvolve_sweep(
+        data: np.ndarray, method: str, duration: int, f0: float, f1: float, fs: int
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Impulse response, frequencies and magnitude of the frequency
+        response from the recording `data` of a calibration sweep. The impulse
+        response starts at the time the sweep started playing."""
+        from scipy import fft
+
+        length, inverse = Analysis.inverse_sweep(method, duration, f0, f1, fs)
+        sweep_length = fs * duration // 1000
+        # Longer recordings would wrap around in the circular convolution.
+        response = fft.rfft(data[: length - sweep_length], length) * inverse
+        impulse_response = fft.irfft(response, length)
+        if method == "logarithmic":
+            # The inverse filter is causal, which delays the linear response
+            # by the sweep length; harmonic distortion lies before it.
+            impulse_response = impulse_response[sweep_length - 1 :]
+
+        return (
+            impulse_response,
+            fft.rfftfreq(length, 1 / fs),
+            np.abs(response),
+        )
@@ -0,0 +1,87 @@
+from collections import OrderedDict
+from threading import Lock
+from typing import Callable, Hashable
+
+
+class AnalysisCache:
+    """Least recently used cache for analysis results, limited by the memory
+    of the NumPy arrays they hold instead of by their count. Results larger
+    than the limit are returned but not cached.
+
+    The cache is shared by the threads of the AnalysisWorker, so all access
+    is locked. Computing a missing result happens outside of the lock.
+
+    Results belong to a `revision`, e.g. of the recording they were computed
+    from. Only results of the current revision, set by `clear`, are cached,
+    so that a task still running for an older one cannot keep its data alive.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 2**20):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[Hashable, tuple[object, int]] = OrderedDict()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._revision: Hashable = None
+        self._lock = Lock()
+
+    @property
+    def revision(self) -> Hashable:
+        return self._revision
+
+    def get(
+        self, key: Hashable, compute: Callable[[], object], revision: Hashable = None
+    ) -> object:
+        """The result cached for `key`, or the result of `compute()`, which
+        is then cached if `revision` is still the current one."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return self._entries[key][0]
+            self._misses += 1
+
+        result = compute()
+        self.put(key, result, revision)
+
+        return result
+
+    def put(self, key: Hashable, result: object, revision: Hashable = None):
+        size = self._size(result)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if revision != self._revision:
+                return
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (result, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._bytes -= self._entries.popitem(last=False)[1][1]
+
+    def clear(self, revision: Hashable = None):
+        """Drops all results; from now on, only those of `revision` are
+        cached."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._revision = revision
+
+    def info(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+            }
+
+    @staticmethod
+    def _size(result: object) -> int:
+        """Bytes held by `result`: arrays and other objects with `nbytes`,
+        e.g. a MinMaxPyramid, also within tuples and lists."""
+        if isinstance(result, (tuple, list)):
+            return sum(AnalysisCache._size(item) for item in result)
+        return getattr(result, "nbytes", 0)
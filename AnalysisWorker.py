@@ -0,0 +1,59 @@
+from typing import Callable
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+
+class AnalysisTaskSignals(QObject):
+    # QRunnable is no QObject, so the signal lives here.
+    finished = Signal(int, object)
+
+
+class AnalysisTask(QRunnable):
+    def __init__(self, generation: int, function: Callable, args: tuple):
+        super().__init__()
+
+        self.generation = generation
+        self.function = function
+        self.args = args
+        self.signals = AnalysisTaskSignals()
+
+    def run(self):
+        self.signals.finished.emit(self.generation, self.function(*self.args))
+
+
+class AnalysisWorker(QObject):
+    """Runs analysis functions on a thread pool, away from the GUI thread.
+
+    Every submission makes all earlier ones stale: queued stale tasks are
+    dropped, running ones finish but their results are discarded. Only the
+    result of the newest submission is emitted by `result_ready`, in the
+    thread of this object.
+    """
+
+    result_ready = Signal(object)
+
+    def __init__(self, parent: QObject | None = None):
+        super().__init__(parent)
+
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(2)
+        self._generation = 0
+        self._task: AnalysisTask | None = None
+
+    def submit(self, function: Callable, *args):
+        self.cancel()
+        self._task = AnalysisTask(self._generation, function, args)
+        self._task.signals.finished.connect(self._handle_finished)
+        self._pool.start(self._task)
+
+    def cancel(self):
+        """Makes all submitted tasks stale."""
+        self._generation += 1
+        self._pool.clear()
+
+    def _handle_finished(self, generation: int, result: object):
+        if generation != self._generation:
+            return
+
+        self._task = None
+        self.result_ready.emit(result)
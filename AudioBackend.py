@@ -0,0 +1,33 @@
+from abc import ABC, abstractmethod
+
+from PySide6.QtMultimedia import QAudioDevice, QAudioFormat, QAudioSink, QAudioSource
+
+
+class AudioBackend(ABC):
+    """Creates the sinks and sources the Controller plays and records with.
+
+    A sink needs `start(device)`, `stop()`, `error()` and a `stateChanged`
+    signal like QAudioSink; a source needs `start()`, which returns a device
+    with `readAll()` and a `readyRead` signal, and `stop()` like
+    QAudioSource.
+    """
+
+    @abstractmethod
+    def create_sink(self, device: QAudioDevice, audio_format: QAudioFormat):
+        ...
+
+    @abstractmethod
+    def create_source(self, device: QAudioDevice, audio_format: QAudioFormat):
+        ...
+
+
+class QtAudioBackend(AudioBackend):
+    """The sound hardware, through Qt Multimedia."""
+
+    def create_sink(self, device: QAudioDevice, audio_format: QAudioFormat) -> QAudioSink:
+        return QAudioSink(device, audio_format)
+
+    def create_source(
+        self, device: QAudioDevice, audio_format: QAudioFormat
+    ) -> QAudioSource:
+        return QAudioSource(device, audio_format)
@@ -0,0 +1,138 @@
+import sys
+from time import perf_counter
+
+import numpy as np
+from Analysis import Analysis
+from Controller import Controller
+from LoopbackBackend import LoopbackBackend
+from Player import Player
+from PySide6.QtCore import QCoreApplication, QEventLoop, QTimer
+from SignalModel import SignalModel
+from SingleSignalModel import SingleSignalModel
+
+
+class Benchmark:
+    """Timings of the hot paths and checks of the calibration, run with
+    `python Benchmark.py`."""
+
+    # Largest deviation in dB from a flat calibration that is accepted.
+    flatness_tolerance: float = 1.0
+
+    @staticmethod
+    def read_data(
+        minutes: tuple[int] = (1, 5, 10), fs: int = 48000, maxlen: int = 4096
+    ) -> list[tuple[int, float]]:
+        """Mean time of one `Player.readData` callback while playing through
+        a stimulus of the given lengths. It should not grow with the length."""
+        results = []
+        for length in minutes:
+            player = Player(fs=fs)
+            player.set_data(np.zeros(length * 60 * fs))
+            player.start()
+
+            calls = 0
+            start = perf_counter()
+            while player.readData(maxlen):
+                calls += 1
+            results.append((length, (perf_counter() - start) / calls))
+            player.stop()
+
+        return results
+
+    @staticmethod
+    def measurement_cycle(
+        steps: tuple[int] = (10, 60), fs: int = 48000, delay: int = 1234
+    ) -> list[tuple[float, float, int]]:
+        """Duration of stimuli with the given numbers of one second steps,
+        the wall time of playing, recording and analysing them through a
+        LoopbackBackend and the latency found, which should be `delay`."""
+        # Timers and signals need an application, which must be kept alive.
+        app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+        loop = QEventLoop()
+        results = []
+        for count in steps:
+            model = SignalModel()
+            model.fs = fs
+            model.remove_all_signals()
+            for step in range(count):
+                model.add_signal(
+                    SingleSignalModel(
+                        fs, 100 * (step + 1), 0.4, 1000, 50, 50, "hann", 20, 20
+                    )
+                )
+            controller = Controller(
+                model, LoopbackBackend(delay=delay, noise=1e-4, seed=0)
+            )
+            revision = model.recording_revision
+            # The Controller has no signal for a finished recording.
+            def quit_when_recorded():
+                if model.recording_revision != revision:
+                    loop.quit()
+
+            poll = QTimer()
+            poll.timeout.connect(quit_when_recorded)
+
+            start = perf_counter()
+            controller.play_record()
+            poll.start(1)
+            loop.exec()
+            poll.stop()
+            data = model.recorded_data[model.latency :]
+            Analysis.step_response(data, fs, model.get_steps())
+            Analysis.windowed_spectrum(data, fs)
+            results.append(
+                (
+                    model.get_signal_offsets()[-1] / fs,
+                    perf_counter() - start,
+                    model.latency,
+                )
+            )
+
+        return results
+
+    @staticmethod
+    def calibration_flatness(
+        fs: int = 48000, duration: int = 5000, f0: float = 100, f1: float = 10000
+    ) -> list[tuple[str, float, float]]:
+        """Lowest and highest level in dB of the frequency response that every
+        calibration sweep yields for an identity system, i.e. a recording of
+        the sweep itself. Both should be close to 0 dB. The edges of the band
+        are left out, where the sweeps start and stop."""
+        results = []
+        for method in SignalModel().get_sweeps():
+            data = Analysis.sweep(method, duration, f0, f1, fs)
+            _, frequencies, magnitudes = Analysis.deconvolve_sweep(
+                np.concatenate([data, np.zeros(fs)]), method, duration, f0, f1, fs
+            )
+            band = (frequencies >= 1.5 * f0) & (frequencies <= f1 / 1.1)
+            levels = 20 * np.log10(magnitudes[band])
+            results.append((method, float(levels.min()), float(levels.max())))
+
+        return results
+
+    @staticmethod
+    def report(file=sys.stdout):
+        print("Player.readData", file=file)
+        for length, seconds in Benchmark.read_data():
+            print(f"  {length:>3} min: {seconds * 1e6:8.2f} µs/callback", file=file)
+
+        print("Kalibrierung eines identischen Systems", file=file)
+        for method, lowest, highest in Benchmark.calibration_flatness():
+            flat = max(-lowest, highest) <= Benchmark.flatness_tolerance
+            print(
+                f"  {method:<12} {lowest:+6.2f} … {highest:+6.2f} dB"
+                f"  {'OK' if flat else 'FEHLER'}",
+                file=file,
+            )
+
+        print("Messzyklus über LoopbackBackend", file=file)
+        for duration, seconds, latency in Benchmark.measurement_cycle():
+            print(
+                f"  {duration:>5.0f} s Stimulus: {seconds:6.2f} s, "
+                f"{duration / seconds:5.1f}x Echtzeit, Latenz {latency} Frames",
+                file=file,
+            )
+
+
+if __name__ == "__main__":
+    Benchmark.report()
@@ -1,9 +1,11 @@
-from struct import unpack
-
 import numpy as np
+from Analysis import Analysis
+from AudioBackend import AudioBackend, QtAudioBackend
 from ConfigParser import ConfigParser
+from LiveAnalyser import LiveAnalyser
+from PcmCodec import PcmCodec
 from Player import Player
-from PySide6.QtCore import QByteArray, QIODevice, QTimer
+from PySide6.QtCore import QIODevice, QTimer
 from PySide6.QtMultimedia import (
     QAudio,
     QAudioDevice,
@@ -13,17 +15,47 @@ from PySide6.QtMultimedia import (
     QMediaDevices,
 )
 from Recorder import Recorder
-from scipy.io import wavfile
 from SignalModel import SignalModel
 from SingleSignalModel import SingleSignalModel
 
 
 class Controller:
-    def __init__(self, model: SignalModel):
+    # Time in ms that is still recorded after playback has finished.
+    record_tail: int = 500
+    # Latency estimates with a lower normalised correlation are not cached,
+    # e.g. those of silent or noisy recordings.
+    latency_min_correlation: float = 0.2
+    # Sample formats offered for playback and recording, see PcmCodec.
+    sample_formats: tuple[QAudioFormat.SampleFormat] = (
+        QAudioFormat.Int16,
+        QAudioFormat.Int32,
+        QAudioFormat.Float,
+    )
+    sample_rates: tuple[int] = (22050, 44100, 48000, 96000, 192000)
+    # Player and Recorder are mono.
+    channel_counts: tuple[int] = (1,)
+
+    def __init__(self, model: SignalModel, backend: AudioBackend | None = None):
         self._model = model
+        # Sound hardware by default; see LoopbackBackend for a simulation.
+        self.backend = backend if backend is not None else QtAudioBackend()
         self.view = None
-        self._input_device = self.get_audio_inputs()[0]
-        self._output_device = self.get_audio_outputs()[0]
+        self.streaming = False
+        self._calibrating = False
+        # Stimulus of the current recording, None if it was streamed.
+        self._reference: np.ndarray | None = None
+        # Round-trip latency in frames per (input, output) device id pair and
+        # sample rate.
+        self._latency_cache: dict[tuple[bytes, bytes, int], int] = {}
+        # Supported formats per device mode and id, until the devices change.
+        # Inputs and outputs of one interface may share an id.
+        self._format_cache: dict[tuple[QAudioDevice.Mode, bytes], list[QAudioFormat]] = {}
+        self._media_devices = QMediaDevices()
+        self._media_devices.audioInputsChanged.connect(self._format_cache.clear)
+        self._media_devices.audioOutputsChanged.connect(self._format_cache.clear)
+        # The default devices are known without enumerating all devices.
+        self._input_device = QMediaDevices.defaultAudioInput()
+        self._output_device = QMediaDevices.defaultAudioOutput()
         self.init_player()
         self.init_recorder()
 
@@ -32,7 +64,9 @@ class Controller:
 
     def init_player(self):
         self._player = Player(QAudioFormat.Int16, self.model.fs)
-        self._audio_sink = QAudioSink(self.output_device, self.player.audio_format)
+        self._audio_sink = self.backend.create_sink(
+            self.output_device, self.player.audio_format
+        )
         self._audio_sink.stateChanged.connect(self.handle_state_changed)
 
     def reset_player(self):
@@ -41,10 +75,14 @@ class Controller:
         self.init_player()
 
     def init_recorder(self):
-        self._record_buffer: QByteArray = QByteArray()
         self._recorder = Recorder(QAudioFormat.Int16, self.model.fs)
-        self._recorder.readyRead.connect(self.handle_ready_read)
-        self._audio_source = QAudioSource(self.input_device, self.recorder.audio_format)
+        self._record_device: QIODevice | None = None
+        self.live_analyser = LiveAnalyser(self.recorder.audio_format.sampleRate())
+        # Bytes of the capture that were fed to the live analyser.
+        self._live_pos = 0
+        self._audio_source = self.backend.create_source(
+            self.input_device, self.recorder.audio_format
+        )
 
     @property
     def model(self) -> SignalModel:
@@ -103,6 +141,20 @@ class Controller:
         self.model.set_analyser_start(start)
         self.model.set_analyser_stop(stop)
 
+    def set_analyser_window(self, window: str):
+        if window.lower() not in self.model.get_analyser_windows():
+            window = self.model.analyser_window
+        self.model.analyser_window = window
+
+    def set_spectrum_resolution(self, resolution: str):
+        if resolution in self.model.get_spectrum_resolutions():
+            self.model.spectrum_resolution = resolution
+
+    def set_streaming(self, value: bool):
+        """Play signals by synthesizing chunks on demand instead of converting
+        the whole stimulus before playback."""
+        self.streaming = value
+
     def set_save_filename(self, filename: str):
         self.model.filename = filename
 
@@ -172,7 +224,10 @@ class Controller:
 
     def set_input_format(self, format_num: int):
         self.recorder.audio_format = self.supported_audio_formats(self.input_device)[format_num]
-        self.model.fs = self.supported_audio_formats(self.input_device)[format_num].sampleRate()
+        self.model.fs = self.recorder.audio_format.sampleRate()
+        self._audio_source = self.backend.create_source(
+            self.input_device, self.recorder.audio_format
+        )
 
     @staticmethod
     def get_audio_outputs() -> list[QAudioDevice]:
@@ -183,17 +238,25 @@ class Controller:
         return self._output_device
 
     def supported_audio_formats(self, audio_device: QAudioDevice) -> list[QAudioFormat]:
-        format_list = []
-        for fs in (22050, 44100, 48000, 96000, 192000):
-            qformat = QAudioFormat()
-            qformat.setSampleRate(fs)
-            qformat.setChannelCount(1)
-            qformat.setSampleFormat(QAudioFormat.Int16)
-
-            if audio_device.isFormatSupported(qformat):
-                format_list.append(qformat)
-
-        return format_list
+        """All combinations of `sample_rates`, `channel_counts` and
+        `sample_formats` that `audio_device` supports. The backend is only
+        asked once per device, until a device is added or removed."""
+        key = (audio_device.mode(), audio_device.id().data())
+        if key not in self._format_cache:
+            format_list = []
+            for fs in self.sample_rates:
+                for channels in self.channel_counts:
+                    for sample_format in self.sample_formats:
+                        qformat = QAudioFormat()
+                        qformat.setSampleRate(fs)
+                        qformat.setChannelCount(channels)
+                        qformat.setSampleFormat(sample_format)
+
+                        if audio_device.isFormatSupported(qformat):
+                            format_list.append(qformat)
+            self._format_cache[key] = format_list
+
+        return self._format_cache[key]
 
     def set_output_device(self, device_num: int):
         self.output_device.swap(self.get_audio_outputs()[device_num])
@@ -201,50 +264,132 @@ class Controller:
 
     def set_output_format(self, format_num: int):
         self.player.audio_format = self.supported_audio_formats(self.output_device)[format_num]
+        self._audio_sink = self.backend.create_sink(
+            self.output_device, self.player.audio_format
+        )
+        self._audio_sink.stateChanged.connect(self.handle_state_changed)
 
-    def record(self):
-        self._record_buffer.clear()
+    def record(self, frames: int = 0):
+        """Starts recording with space for `frames` plus the tail after
+        playback reserved in advance."""
+        self.recorder.reserve(frames + self.model.get_frames(2 * self.record_tail))
+        if self.live_analyser.fs != self.recorder.audio_format.sampleRate():
+            self.live_analyser = LiveAnalyser(self.recorder.audio_format.sampleRate())
+        self.live_analyser.reset()
+        self._live_pos = 0
+        if self.view is not None:
+            self.view.start_live_view()
         # FIXME: Why is Recorder() not working? Thanks Qt!
-        # FIXME: self._record_buffer -> self.recorder.buffer.
-        self.recorder = self.audio_source.start()
-        self.recorder.readyRead.connect(self.handle_ready_read)
+        # The pulled device is read into the recorder's buffer instead.
+        self.release_record_device()
+        self._record_device = self.audio_source.start()
+        self._record_device.readyRead.connect(self.handle_ready_read)
+
+    def release_record_device(self):
+        """Disconnects the device of the last recording. A backend may return
+        the same device for every recording, which must not be read once more
+        per recording."""
+        if self._record_device is not None:
+            self._record_device.readyRead.disconnect(self.handle_ready_read)
+            self._record_device = None
+
+    def play_calibration(self):
+        """Plays and records the calibration sweep, which is deconvolved
+        afterwards."""
+        self.play_record(self.model.generate_sweep())
+        self._calibrating = True
 
     def play_record(self, data: list[float] | bool = False):
-        if data is False:
-            data = np.concatenate([s.data for s in self.model.get_signals()])
-        self.player.set_data(data)
-        self.record()
+        self._calibrating = False
+        if data is False and self.streaming:
+            self.player.set_stream(self.model.iter_stimulus())
+            frames = sum(len(s) for s in self.model.get_signals())
+            self._reference = None
+        else:
+            if data is False:
+                data = self.model.get_stimulus()
+            self.player.set_data(data)
+            frames = len(data)
+            self._reference = np.asarray(data)
+        self.record(frames)
         self.player.start()
         self.audio_sink.start(self.player)
 
     def handle_ready_read(self):
         # .readAll() is inherited by QIODevice.
-        self._record_buffer.append(self.recorder.readAll())
+        self.recorder.append(memoryview(self._record_device.readAll()))
+
+        # Only whole samples are decoded; the rest follows with the next call.
+        audio_format = self.recorder.audio_format
+        data = self.recorder.data()
+        end = len(data) - (len(data) - self._live_pos) % audio_format.bytesPerSample()
+        self.live_analyser.feed(
+            PcmCodec.decode(data[self._live_pos : end], audio_format.sampleFormat())
+        )
+        self._live_pos = end
 
     def handle_state_changed(self, state: QAudio.State | QAudio.Error):
         if state == QAudio.IdleState:
             self._audio_sink.stop()
             self.player.stop()
-            QTimer.singleShot(500, self.stop_recording_with_offset)
+            QTimer.singleShot(self.record_tail, self.stop_recording_with_offset)
 
         if self.audio_sink.error() != QAudio.NoError:
             print(self.audio_sink.error())
 
     def stop_recording_with_offset(self):
-        # TODO: possible bug in conversion. Do we need to convert at all?
         self.audio_source.stop()
-        self.model.recorded_data = np.array(
-            [
-                i / 32767
-                for i in unpack(
-                    f"<{len(self._record_buffer.data()) >> 1}h",
-                    self._record_buffer.data(),
-                )
-            ]
+        self.release_record_device()
+        if self.view is not None:
+            self.view.stop_live_view()
+        self.model.recorded_data = PcmCodec.decode(
+            self.recorder.data(), self.recorder.audio_format.sampleFormat()
         )
-
-        self.view.update_sink_graphs()
+        self.model.latency = self.estimate_latency()
+        if self.view is not None:
+            # Both are analysed on the View's thread pool.
+            if self._calibrating:
+                self.view.update_calibration_graphs()
+            self.view.update_sink_graphs()
         # TODO: automatically update_sink_graphs() in View.
 
+    def estimate_latency(self) -> int:
+        """Round-trip latency of the current device pair in frames. It is
+        estimated from the last recording once and then taken from a cache,
+        unless the stimulus could not be found clearly in the recording."""
+        key = (
+            self.input_device.id().data(),
+            self.output_device.id().data(),
+            self.model.fs,
+        )
+        if key in self._latency_cache:
+            return self._latency_cache[key]
+
+        reference = self._reference
+        if reference is None:
+            reference = self.model.get_stimulus()
+        # Only the start of the stimulus is correlated, see Analysis.
+        frames = self.model.get_frames(Analysis.latency_window)
+        recorded = self.model.recorded_data
+        latency = Analysis.estimate_latency(
+            reference, recorded, len(recorded) - len(reference), frames
+        )
+        if (
+            Analysis.latency_correlation(reference, recorded, latency, frames)
+            >= self.latency_min_correlation
+        ):
+            self._latency_cache[key] = latency
+
+        return latency
+
+    def reset_latency(self):
+        """Estimates the latency again with the next recording."""
+        self._latency_cache.clear()
+
+    def set_latency_compensation(self, value: bool):
+        self.model.latency_compensation = value
+
     def export_audio(self, filename: str):
+        from scipy.io import wavfile
+
         wavfile.write(filename, self.model.fs, self.model.recorded_data)
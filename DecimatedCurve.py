@@ -0,0 +1,49 @@
+import numpy as np
+import pyqtgraph as pg
+from MinMaxPyramid import MinMaxPyramid
+
+
+class DecimatedCurve:
+    """Draws a signal into `plot` with only about two points per pixel of the
+    visible range, served from a MinMaxPyramid whenever the range changes.
+    Outside of the visible range a coarse overview is kept, so that the view
+    can still be auto-ranged to the whole signal."""
+
+    def __init__(self, widget: pg.PlotWidget, plot: pg.PlotDataItem):
+        self._widget = widget
+        self._plot = plot
+        self._pyramid: MinMaxPyramid | None = None
+
+        view_box = self._widget.getViewBox()
+        view_box.sigXRangeChanged.connect(self.refresh)
+        view_box.sigResized.connect(self.refresh)
+
+    def set_data(self, data: np.ndarray | MinMaxPyramid, fs: int = 1):
+        """Plots `data` (sampled at `fs`) or an already built pyramid."""
+        if isinstance(data, MinMaxPyramid):
+            self._pyramid = data
+        else:
+            self._pyramid = MinMaxPyramid(data, fs) if len(data) else None
+        self.refresh()
+
+    def clear(self):
+        self._pyramid = None
+        self._plot.setData([], [])
+
+    def refresh(self, *_):
+        if self._pyramid is None:
+            return
+
+        width = max(100, int(self._widget.getViewBox().width()))
+        start, stop = self._widget.getViewBox().viewRange()[0]
+        x, y = self._pyramid.get(start, stop, width)
+        overview_x, overview_y = self._pyramid.get(
+            0, self._pyramid.duration, width // 8
+        )
+        before = overview_x < x[0] if len(x) else overview_x < start
+        after = overview_x > x[-1] if len(x) else overview_x > stop
+
+        self._plot.setData(
+            np.concatenate([overview_x[before], x, overview_x[after]]),
+            np.concatenate([overview_y[before], y, overview_y[after]]),
+        )
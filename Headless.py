@@ -0,0 +1,346 @@
+import argparse
+import os
+import sys
+from functools import lru_cache
+from multiprocessing import Pool
+from time import perf_counter
+
+import numpy as np
+from Analysis import Analysis
+from ConfigParser import ConfigParser
+from PcmScale import PcmScale
+from scipy.io import wavfile
+from Stimulus import Stimulus
+
+
+class Headless:
+    """Rendering of stimuli and analysis of recordings without Qt, e.g. on
+    servers without a display. Run `python Headless.py --help`."""
+
+    @staticmethod
+    def load_stimulus(config: str) -> tuple[Stimulus, int]:
+        """Stimulus of all signals in the `.cfg` file `config` and its fs."""
+        signals = ConfigParser.load(config)
+        if not signals:
+            raise ValueError(f"No signals in {config}")
+
+        return Stimulus(signals), signals[0].fs
+
+    @staticmethod
+    @lru_cache(maxsize=4)
+    def cached_stimulus(config: str) -> tuple[Stimulus, int]:
+        """Like `load_stimulus`, but composed only once per process."""
+        stimulus, fs = Headless.load_stimulus(config)
+        stimulus.compose()
+
+        return stimulus, fs
+
+    @staticmethod
+    def render(config: str, filename: str):
+        """Writes the stimulus of `config` as a 32 bit float WAV file."""
+        stimulus, fs = Headless.load_stimulus(config)
+        wavfile.write(filename, fs, stimulus.data.astype(np.float32))
+
+    @staticmethod
+    def read_pcm(filename: str, mmap: bool = True) -> tuple[int, np.ndarray]:
+        """fs and raw samples of the first channel of a WAV file, by default
+        memory-mapped instead of read. See PcmScale for their conversion."""
+        fs, data = wavfile.read(filename, mmap=mmap)
+        if data.ndim > 1:
+            data = data[:, 0]
+        if not PcmScale.supports(data.dtype):
+            raise ValueError(f"Nicht unterstütztes Sample-Format: {data.dtype}")
+
+        return fs, data
+
+    @staticmethod
+    def read_wav(filename: str) -> tuple[int, np.ndarray]:
+        """fs and samples in [-1, 1] of the first channel of a WAV file."""
+        fs, data = Headless.read_pcm(filename, mmap=False)
+        return fs, PcmScale.to_float(data)
+
+    @staticmethod
+    def analyse(
+        data: np.ndarray,
+        fs: int,
+        stimulus: Stimulus | None = None,
+        start: int = 0,
+        stop: int = -1,
+        window: str = "hann",
+        resolution: str = "1/24",
+    ) -> tuple[int, np.ndarray, np.ndarray, np.ndarray]:
+        """Latency, spectrum and step response of the recording `data`, as
+        the GUI computes them. Without a `stimulus`, there is neither a
+        latency nor a step response.
+
+        `data` may also hold raw samples (see PcmScale), e.g. of a
+        memory-mapped file. Then only the part each step of the analysis
+        needs is converted to float, and nothing is kept afterwards."""
+        latency = 0
+        step_response = np.zeros((0, 3))
+        if stimulus is not None:
+            reference = stimulus.data
+            # Only the start of the stimulus is correlated, see Analysis.
+            frames = fs * Analysis.latency_window // 1000
+            max_lag = len(data) - len(reference)
+            latency = Analysis.estimate_latency(
+                reference,
+                PcmScale.to_float(data[: Analysis.onset(reference) + frames + max_lag]),
+                max_lag,
+                frames,
+            )
+            data = data[latency:]
+            steps = stimulus.get_steps()
+            first = min(step_start for _, step_start, _ in steps)
+            last = max(step_stop for _, _, step_stop in steps)
+            step_response = Analysis.step_response(
+                PcmScale.to_float(data[first:last]),
+                fs,
+                [
+                    (hertz, step_start - first, step_stop - first)
+                    for hertz, step_start, step_stop in steps
+                ],
+            )
+
+        frequencies, magnitudes = Analysis.windowed_spectrum(
+            PcmScale.to_float(Analysis.slice_interval(data, fs, start, stop)),
+            fs,
+            window,
+        )
+        if resolution != "full":
+            frequencies, magnitudes = Analysis.reduce_spectrum(
+                frequencies, magnitudes, fs, int(resolution.split("/")[1])
+            )
+
+        return latency, frequencies, magnitudes, step_response
+
+    @staticmethod
+    def analyse_file(
+        filename: str,
+        config: str | None = None,
+        start: int = 0,
+        stop: int = -1,
+        window: str = "hann",
+        resolution: str = "1/24",
+    ) -> tuple:
+        """`analyse` of one memory-mapped WAV file, as a job of `batch`.
+        Returns the file name, fs, frame count and the results of `analyse`,
+        or the file name and an error message."""
+        try:
+            fs, data = Headless.read_pcm(filename)
+            stimulus = None
+            if config:
+                stimulus, stimulus_fs = Headless.cached_stimulus(config)
+                if fs != stimulus_fs:
+                    raise ValueError(f"{fs} Hz statt {stimulus_fs} Hz")
+
+            return (
+                filename,
+                fs,
+                len(data),
+                *Headless.analyse(data, fs, stimulus, start, stop, window, resolution),
+            )
+        except (OSError, ValueError) as e:
+            return filename, str(e) or repr(e)
+
+    @staticmethod
+    def batch(
+        directory: str,
+        prefix: str,
+        jobs: int | None = None,
+        config: str | None = None,
+        start: int = 0,
+        stop: int = -1,
+        window: str = "hann",
+        resolution: str = "1/24",
+        file=sys.stdout,
+    ) -> int:
+        """Analyses all WAV files in `directory` on `jobs` processes (all
+        cores by default). Results are appended, in the order the files
+        finish, to `<prefix>_files.csv`, `<prefix>_spectrum.csv` and
+        `<prefix>_steps.csv`, one row per file, band and step. Returns the
+        number of failed files."""
+        filenames = sorted(
+            os.path.join(directory, name)
+            for name in os.listdir(directory)
+            if name.lower().endswith(".wav")
+        )
+        if config:
+            # Fails early and lets the workers fork with a composed stimulus.
+            Headless.cached_stimulus(config)
+
+        failed = 0
+        frames = 0
+        began = perf_counter()
+        with (
+            open(f"{prefix}_files.csv", "w") as files,
+            open(f"{prefix}_spectrum.csv", "w") as spectra,
+            open(f"{prefix}_steps.csv", "w") as steps,
+            Pool(jobs) as pool,
+        ):
+            files.write("file,fs,frames,latency\n")
+            spectra.write("file,frequency,magnitude\n")
+            steps.write("file,frequency,amplitude,phase\n")
+
+            results = pool.imap_unordered(
+                Headless._analyse_job,
+                ((name, config, start, stop, window, resolution) for name in filenames),
+            )
+            for done, result in enumerate(results, 1):
+                name = os.path.basename(result[0])
+                if len(result) == 2:
+                    failed += 1
+                    print(f"[{done}/{len(filenames)}] {name}: {result[1]}", file=file)
+                    continue
+
+                _, fs, length, latency, frequencies, magnitudes, response = result
+                frames += length
+                files.write(f"{name},{fs},{length},{latency}\n")
+                for row in np.column_stack([frequencies, magnitudes]):
+                    spectra.write(f"{name},{row[0]:.6g},{row[1]:.6g}\n")
+                for hertz, amplitude, phase in response:
+                    steps.write(
+                        f"{name},{hertz:.6g},{amplitude:.6g},{np.degrees(phase):.6g}\n"
+                    )
+
+                elapsed = perf_counter() - began
+                print(
+                    f"[{done}/{len(filenames)}] {name}: "
+                    f"{done / elapsed:.1f} Dateien/s, "
+                    f"{frames / fs / elapsed:.0f} s Audio/s",
+                    file=file,
+                )
+
+        print(
+            f"{len(filenames) - failed} von {len(filenames)} Dateien "
+            f"in {perf_counter() - began:.1f} s analysiert",
+            file=file,
+        )
+
+        return failed
+
+    @staticmethod
+    def _analyse_job(args: tuple) -> tuple:
+        return Headless.analyse_file(*args)
+
+    @staticmethod
+    def write_results(
+        prefix: str,
+        frequencies: np.ndarray,
+        magnitudes: np.ndarray,
+        step_response: np.ndarray,
+    ):
+        """Writes `<prefix>_spectrum.csv` and, if there are steps,
+        `<prefix>_steps.csv` with the phase in degrees."""
+        np.savetxt(
+            f"{prefix}_spectrum.csv",
+            np.column_stack([frequencies, magnitudes]),
+            fmt="%.6g",
+            delimiter=",",
+            header="frequency,magnitude",
+            comments="",
+        )
+        if len(step_response):
+            hertz, amplitude, phase = step_response.T
+            np.savetxt(
+                f"{prefix}_steps.csv",
+                np.column_stack([hertz, amplitude, np.degrees(phase)]),
+                fmt="%.6g",
+                delimiter=",",
+                header="frequency,amplitude,phase",
+                comments="",
+            )
+
+    @staticmethod
+    def parse_args(argv: list[str]) -> argparse.Namespace:
+        parser = argparse.ArgumentParser(
+            prog="Headless.py", description="Stepped Frequency Analyser ohne GUI"
+        )
+        commands = parser.add_subparsers(dest="command", required=True)
+
+        render = commands.add_parser("render", help="Stimulus als WAV schreiben")
+        render.add_argument("config", help="Signalkonfiguration (.cfg)")
+        render.add_argument("output", help="WAV-Datei")
+
+        analyse = commands.add_parser("analyse", help="Aufnahmen analysieren")
+        analyse.add_argument("recordings", nargs="+", help="WAV-Dateien")
+        analyse.add_argument(
+            "-o", "--output-dir", default=".", help="Verzeichnis der CSV-Dateien"
+        )
+
+        batch = commands.add_parser(
+            "batch", help="Alle Aufnahmen eines Verzeichnisses parallel analysieren"
+        )
+        batch.add_argument("directory", help="Verzeichnis mit WAV-Dateien")
+        batch.add_argument(
+            "-o", "--output", default="batch", help="Präfix der CSV-Dateien"
+        )
+        batch.add_argument(
+            "-j", "--jobs", type=int, help="Anzahl der Prozesse, sonst alle Kerne"
+        )
+
+        for command in (analyse, batch):
+            command.add_argument(
+                "-c", "--config", help="Signalkonfiguration für Latenz und Stufen"
+            )
+            command.add_argument("--start", type=int, default=0, help="Start in ms")
+            command.add_argument(
+                "--stop", type=int, default=-1, help="Ende in ms, -1 für das Ende"
+            )
+            command.add_argument("--window", default="hann", help="Analysefenster")
+            command.add_argument(
+                "--resolution",
+                default="1/24",
+                choices=("1/3", "1/12", "1/24", "full"),
+                help="Frequenzauflösung des Spektrums",
+            )
+
+        return parser.parse_args(argv)
+
+    @staticmethod
+    def main(argv: list[str]) -> int:
+        args = Headless.parse_args(argv)
+        if args.command == "render":
+            Headless.render(args.config, args.output)
+            return 0
+        if args.command == "batch":
+            failed = Headless.batch(
+                args.directory,
+                args.output,
+                args.jobs,
+                args.config,
+                args.start,
+                args.stop,
+                args.window,
+                args.resolution,
+            )
+            return int(failed > 0)
+
+        os.makedirs(args.output_dir, exist_ok=True)
+        status = 0
+        for filename in args.recordings:
+            result = Headless.analyse_file(
+                filename,
+                args.config,
+                args.start,
+                args.stop,
+                args.window,
+                args.resolution,
+            )
+            if len(result) == 2:
+                print(f"{filename}: {result[1]}", file=sys.stderr)
+                status = 1
+                continue
+
+            _, fs, _, latency, *results = result
+            prefix = os.path.join(
+                args.output_dir, os.path.splitext(os.path.basename(filename))[0]
+            )
+            Headless.write_results(prefix, *results)
+            print(f"{filename}: Latenz {latency / fs * 1000:.1f} ms")
+
+        return status
+
+
+if __name__ == "__main__":
+    sys.exit(Headless.main(sys.argv[1:]))
@@ -0,0 +1,84 @@
+import numpy as np
+
+
+class LiveAnalyser:
+    """Streaming STFT and level meter for the samples of a running recording.
+
+    `feed` appends the spectra of all complete frames (Hann windowed, with
+    `hop` frames between them) as columns to a rolling spectrogram in dBFS.
+    To bound the cost per call, at most `max_frames` frames are analysed per
+    call; if more are pending, the oldest ones are skipped.
+    """
+
+    floor: float = -120.0  # dBFS shown for silence.
+
+    def __init__(
+        self,
+        fs: int,
+        frame_length: int = 2048,
+        hop: int = 1024,
+        columns: int = 400,
+        max_frames: int = 16,
+    ):
+        self.fs = fs
+        self.frame_length = frame_length
+        self.hop = hop
+        self.max_frames = max_frames
+        # The same as Analysis.get_window("hann", …), without importing SciPy
+        # when the recorder is set up at startup.
+        self._window = np.hanning(frame_length)
+        # Amplitude of a full-scale sine in the windowed spectrum.
+        self._full_scale = np.sum(self._window) / 2
+        self._spectrogram = np.full((columns, frame_length // 2 + 1), self.floor)
+        self.reset()
+
+    def reset(self):
+        self._spectrogram.fill(self.floor)
+        self._column = 0
+        self._pending = np.zeros(0)
+        self._peak = 0.0
+        self._squares = 0.0
+        self._count = 0
+
+    def feed(self, samples: np.ndarray):
+        if not len(samples):
+            return
+
+        self._peak = max(self._peak, float(np.max(np.abs(samples))))
+        self._squares += float(np.dot(samples, samples))
+        self._count += len(samples)
+
+        pending = np.concatenate([self._pending, samples])
+        frames = max(0, (len(pending) - self.frame_length) // self.hop + 1)
+        if frames > self.max_frames:
+            pending = pending[(frames - self.max_frames) * self.hop :]
+            frames = self.max_frames
+
+        if frames:
+            windows = np.lib.stride_tricks.sliding_window_view(
+                pending, self.frame_length
+            )[: frames * self.hop : self.hop]
+            spectra = np.abs(np.fft.rfft(windows * self._window, axis=1))
+            spectra = 20 * np.log10(
+                np.maximum(spectra / self._full_scale, 10 ** (self.floor / 20))
+            )
+            rows = (self._column + np.arange(frames)) % len(self._spectrogram)
+            self._spectrogram[rows] = spectra
+            self._column = (self._column + frames) % len(self._spectrogram)
+
+        self._pending = pending[frames * self.hop :]
+
+    def spectrogram(self) -> np.ndarray:
+        """Columns of time and rows of frequency, oldest column first."""
+        return np.roll(self._spectrogram, -self._column, axis=0)
+
+    def take_levels(self) -> tuple[float, float]:
+        """Peak and RMS level in dBFS since the last call."""
+        peak = self._peak
+        rms = np.sqrt(self._squares / self._count) if self._count else 0.0
+        self._peak, self._squares, self._count = 0.0, 0.0, 0
+
+        return tuple(
+            float(20 * np.log10(max(level, 10 ** (self.floor / 20))))
+            for level in (peak, rms)
+        )
@@ -0,0 +1,164 @@
+import numpy as np
+from AudioBackend import AudioBackend
+from PcmCodec import PcmCodec
+from PySide6.QtCore import QIODevice, QObject, QTimer, Signal
+from PySide6.QtMultimedia import QAudio, QAudioDevice, QAudioFormat
+
+
+class LoopbackSink(QObject):
+    """Reads the played device as fast as the event loop allows and passes
+    the samples to its backend."""
+
+    stateChanged = Signal(object)
+
+    def __init__(self, backend: "LoopbackBackend", audio_format: QAudioFormat):
+        super().__init__()
+
+        self._backend = backend
+        self._audio_format = audio_format
+        self._device: QIODevice | None = None
+        self._state = QAudio.StoppedState
+        self._timer = QTimer(self)
+        self._timer.timeout.connect(self._pump)
+
+    def start(self, device: QIODevice):
+        self._device = device
+        self._backend.reset()
+        self._set_state(QAudio.ActiveState)
+        self._timer.start(0)
+
+    def stop(self):
+        self._timer.stop()
+        self._set_state(QAudio.StoppedState)
+
+    def state(self) -> QAudio.State:
+        return self._state
+
+    def error(self) -> QAudio.Error:
+        return QAudio.NoError
+
+    def _pump(self):
+        data = self._device.read(
+            self._backend.chunk_frames * self._audio_format.bytesPerFrame()
+        )
+        if not len(data):
+            self._timer.stop()
+            self._backend.flush(self._audio_format.sampleRate())
+            self._set_state(QAudio.IdleState)
+            return
+
+        self._backend.transmit(
+            PcmCodec.decode(memoryview(data), self._audio_format.sampleFormat())
+        )
+
+    def _set_state(self, state: QAudio.State):
+        if state != self._state:
+            self._state = state
+            self.stateChanged.emit(state)
+
+
+class LoopbackSource(QObject):
+    """Receives the samples of its backend as if they were recorded. `start`
+    returns the source itself as the device to read from."""
+
+    readyRead = Signal()
+
+    def __init__(self, audio_format: QAudioFormat):
+        super().__init__()
+
+        self._audio_format = audio_format
+        self._pending = bytearray()
+        self._active = False
+
+    def start(self) -> "LoopbackSource":
+        self._pending.clear()
+        self._active = True
+        return self
+
+    def stop(self):
+        self._active = False
+
+    def receive(self, samples: np.ndarray):
+        if not self._active:
+            return
+
+        self._pending += PcmCodec.encode(samples, self._audio_format.sampleFormat())
+        self.readyRead.emit()
+
+    def readAll(self) -> bytes:
+        data = bytes(self._pending)
+        self._pending.clear()
+
+        return data
+
+
+class LoopbackBackend(AudioBackend):
+    """Simulated sound hardware: everything played is recorded again, so the
+    whole measurement runs without sound hardware and faster than real time.
+
+    On the way, the samples are filtered by the IIR filter `filter` (b and a
+    as for scipy.signal.lfilter), delayed by `delay` frames and white noise
+    with the standard deviation `noise` is added. After playback, `tail` ms
+    of silence pass through as well, which is at least what the Controller
+    records after playback. Sink and source should use the same sample rate.
+    """
+
+    def __init__(
+        self,
+        delay: int = 0,
+        noise: float = 0.0,
+        filter: tuple[np.ndarray, np.ndarray] | None = None,
+        tail: int = 500,
+        chunk_frames: int = 4096,
+        seed: int | None = None,
+    ):
+        self.delay = delay
+        self.noise = noise
+        self.filter = filter
+        self.tail = tail
+        self.chunk_frames = chunk_frames
+        self._rng = np.random.default_rng(seed)
+        self._source: LoopbackSource | None = None
+        self.reset()
+
+    def create_sink(
+        self, device: QAudioDevice, audio_format: QAudioFormat
+    ) -> LoopbackSink:
+        return LoopbackSink(self, audio_format)
+
+    def create_source(
+        self, device: QAudioDevice, audio_format: QAudioFormat
+    ) -> LoopbackSource:
+        # Only the newest source records, as in the Controller.
+        self._source = LoopbackSource(audio_format)
+        return self._source
+
+    def reset(self):
+        """Clears the delay line and the state of the filter."""
+        self._delay_line = np.zeros(self.delay)
+        self._filter_state = None
+
+    def transmit(self, samples: np.ndarray):
+        if self.filter is not None:
+            from scipy import signal
+
+            b, a = self.filter
+            if self._filter_state is None:
+                self._filter_state = np.zeros(max(len(a), len(b)) - 1)
+            samples, self._filter_state = signal.lfilter(
+                b, a, samples, zi=self._filter_state
+            )
+
+        delayed = np.concatenate([self._delay_line, samples])
+        samples, self._delay_line = delayed[: len(samples)], delayed[len(samples) :]
+        if self.noise:
+            samples = samples + self._rng.normal(0, self.noise, len(samples))
+
+        if self._source is not None:
+            self._source.receive(samples)
+
+    def flush(self, fs: int):
+        """Transmits the silence after playback in chunks."""
+        frames = self.delay + self.tail * fs // 1000
+        for start in range(0, frames, self.chunk_frames):
+            self.transmit(np.zeros(min(self.chunk_frames, frames - start)))
@@ -0,0 +1,75 @@
+import numpy as np
+
+
+class MinMaxPyramid:
+    """Minima and maxima of a signal over blocks of `factor`, `factor`², …
+    frames, computed once, so that any time range can be drawn with about two
+    points per pixel. Plotting min and max of every block keeps every peak
+    visible, unlike plain subsampling.
+
+    The x-axis (in s) is only computed for the points that are served.
+    """
+
+    def __init__(self, data: np.ndarray, fs: int, factor: int = 4):
+        self._data = data
+        self._fs = fs
+        # Block size, minima and maxima per level; level 0 is the data itself.
+        self._levels: list[tuple[int, np.ndarray, np.ndarray]] = [(1, data, data)]
+
+        block = 1
+        mins, maxs = data, data
+        while len(mins) > factor:
+            block *= factor
+            mins = self._reduce(mins, factor, np.minimum)
+            maxs = self._reduce(maxs, factor, np.maximum)
+            self._levels.append((block, mins, maxs))
+
+    @property
+    def nbytes(self) -> int:
+        """Memory of the reduced levels; the data itself is not copied."""
+        return sum(mins.nbytes + maxs.nbytes for _, mins, maxs in self._levels[1:])
+
+    @property
+    def duration(self) -> float:
+        return len(self._data) / self._fs
+
+    def get(
+        self, start: float, stop: float, points: int
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """x and y of at most about `points` min/max pairs between `start` and
+        `stop` (in s). Ranges with fewer frames are served unreduced."""
+        first = max(0, int(start * self._fs))
+        last = min(len(self._data), int(np.ceil(stop * self._fs)) + 1)
+        if last <= first or points <= 0:
+            return np.zeros(0), np.zeros(0)
+
+        level = 0
+        while (
+            level + 1 < len(self._levels)
+            and (last - first) / self._levels[level][0] > points
+        ):
+            level += 1
+        block, mins, maxs = self._levels[level]
+
+        if block == 1:
+            return np.arange(first, last) / self._fs, self._data[first:last]
+
+        first, last = first // block, -(-last // block)
+        x = (np.arange(first, last) + 0.5) * (block / self._fs)
+        y = np.empty(2 * (last - first))
+        y[0::2] = mins[first:last]
+        y[1::2] = maxs[first:last]
+
+        return np.repeat(x, 2), y
+
+    @staticmethod
+    def _reduce(data: np.ndarray, factor: int, function: np.ufunc) -> np.ndarray:
+        # A last, partial block is reduced on its own.
+        full = len(data) // factor * factor
+        # Element-wise over strided views is much faster than reducing rows.
+        reduced = function(data[0:full:factor], data[1:full:factor])
+        for offset in range(2, factor):
+            function(reduced, data[offset:full:factor], out=reduced)
+        if full < len(data):
+            reduced = np.append(reduced, function.reduce(data[full:]))
+        return reduced
@@ -0,0 +1,41 @@
+import numpy as np
+from PcmScale import PcmScale
+from PySide6.QtMultimedia import QAudioFormat
+
+
+class PcmCodec:
+    """Vectorized conversion between PCM bytes and floating point samples in
+    the range [-1, 1], for every sample format Qt may negotiate."""
+
+    # dtype of the raw samples per sample format; see PcmScale for scaling.
+    _formats: dict = {
+        QAudioFormat.UInt8: np.dtype("u1"),
+        QAudioFormat.Int16: np.dtype("<i2"),
+        QAudioFormat.Int32: np.dtype("<i4"),
+        QAudioFormat.Float: np.dtype("<f4"),
+    }
+
+    @staticmethod
+    def encode(float_data, sample_format: QAudioFormat.SampleFormat) -> bytes:
+        """Encodes floating point samples into PCM bytes. Values outside of
+        [-1, 1] are clipped."""
+        if sample_format not in PcmCodec._formats:
+            raise ValueError(f"Unsupported sample format: {sample_format}")
+
+        return PcmScale.from_float(
+            float_data, PcmCodec._formats[sample_format]
+        ).tobytes()
+
+    @staticmethod
+    def decode(data, sample_format: QAudioFormat.SampleFormat) -> np.ndarray:
+        """Decodes PCM `data` (any bytes-like object) into a new float64 array.
+        Trailing bytes of an incomplete sample are ignored."""
+        if sample_format not in PcmCodec._formats:
+            raise ValueError(f"Unsupported sample format: {sample_format}")
+
+        dtype = PcmCodec._formats[sample_format]
+        data = memoryview(data).cast("B")
+        samples = np.frombuffer(
+            data, dtype=dtype, count=len(data) // dtype.itemsize
+        )
+        return PcmScale.to_float(samples)
@@ -0,0 +1,50 @@
+import numpy as np
+
+
+class PcmScale:
+    """Scaling between raw PCM samples and floating point samples in the
+    range [-1, 1], per dtype of the raw samples. Independent of Qt, so that
+    WAV files can be converted without it."""
+
+    # Offset and full scale per dtype of the raw samples.
+    _scales: dict = {
+        np.dtype("u1"): (128, 127),
+        np.dtype("<i2"): (0, 32767),
+        np.dtype("<i4"): (0, 2147483647),
+        np.dtype("<f4"): (0, 1),
+        np.dtype("<f8"): (0, 1),
+    }
+
+    @staticmethod
+    def supports(dtype: np.dtype) -> bool:
+        return np.dtype(dtype) in PcmScale._scales
+
+    @staticmethod
+    def from_float(float_data, dtype: np.dtype) -> np.ndarray:
+        """Raw samples of `dtype` for floating point samples. Values outside
+        of [-1, 1] are clipped."""
+        dtype = np.dtype(dtype)
+        offset, scale = PcmScale._scales[dtype]
+        samples = np.clip(np.asarray(float_data, dtype=np.float64), -1.0, 1.0)
+        if dtype.kind != "f":
+            # Scaling by the positive full scale keeps 0.0 at `offset` and is
+            # symmetric; `* 32767.5 - 0.5` would add a DC offset of half a
+            # step. Rounding instead of truncating halves the quantisation
+            # error.
+            np.multiply(samples, scale, out=samples)
+            np.rint(samples, out=samples)
+            samples += offset
+        return samples.astype(dtype, copy=False)
+
+    @staticmethod
+    def to_float(samples: np.ndarray) -> np.ndarray:
+        """Floating point samples (float64) for raw `samples`. float64
+        samples are returned as they are, everything else is converted."""
+        offset, scale = PcmScale._scales[samples.dtype]
+        if offset:
+            decoded = np.subtract(samples, offset, dtype=np.float64)
+            decoded *= 1 / scale
+            return decoded
+        if scale == 1:
+            return samples.astype(np.float64, copy=False)
+        return np.multiply(samples, 1 / scale, dtype=np.float64)
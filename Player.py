@@ -1,5 +1,7 @@
-from struct import pack
+from typing import Iterable, Iterator
 
+import numpy as np
+from PcmCodec import PcmCodec
 from PySide6.QtCore import QByteArray, QIODevice
 from PySide6.QtMultimedia import QAudioFormat
 
@@ -21,8 +23,12 @@ class Player(QIODevice):
         self._audio_format.setChannelCount(1)
         self._audio_format.setSampleFormat(self.sample_format)
         self.buffer = QByteArray()
+        self._view = memoryview(self.buffer)
         self.float_data = []
         self.m_pos = 0
+        # Streaming mode: chunks are encoded on demand in `readData`.
+        self._stream: Iterator[np.ndarray] | None = None
+        self._pending = bytearray()
 
     @property
     def sample_format(self) -> QAudioFormat:
@@ -65,28 +71,60 @@ class Player(QIODevice):
         self.m_pos = max(min(self.buffer.size() - 1, pos), 0)
 
     def set_data(self, float_data: list[float]):
+        self._stream = None
         self.float_data = float_data
         self.generate_data()
 
+    def set_stream(self, chunks: Iterable[np.ndarray]):
+        """Plays floating point `chunks` as they are requested by the sink
+        instead of converting all data in advance. Only a few chunks are held
+        in memory at a time."""
+        self._stream = iter(chunks)
+        self._pending.clear()
+        self.float_data = []
+        self.set_raw_data(QByteArray())
+
     def set_raw_data(self, raw_data: QByteArray):
         self.buffer = raw_data
+        self._view = memoryview(self.buffer)
 
     def generate_data(self):
-        self.buffer.clear()
+        self.buffer = QByteArray(self.encode(self.float_data))
+        self._view = memoryview(self.buffer)
 
-        # TODO: consider variable sample format. Now it is Int16.
-        # TODO: Shouldn't it be `chunk * 32767.5 - 0.5`?
-        for chunk in self.float_data:
-            self.buffer.append(pack("<h", int(chunk * 32767)))
+    def encode(self, float_data: list[float]) -> bytes:
+        return PcmCodec.encode(float_data, self.audio_format.sampleFormat())
 
     def readData(self, maxlen: int) -> bytes:
+        if self._stream is not None:
+            return self.read_stream(maxlen)
+
         old_pos = self.m_pos
         self.m_pos = min(self.buffer.size(), self.m_pos + maxlen)
 
-        return self.buffer.data()[old_pos : self.m_pos]
+        # Slicing the persistent view only copies the requested bytes, while
+        # `self.buffer.data()` would copy the whole buffer on every call.
+        return self._view[old_pos : self.m_pos].tobytes()
+
+    def read_stream(self, maxlen: int) -> bytes:
+        while len(self._pending) < maxlen:
+            chunk = next(self._stream, None)
+            if chunk is None:
+                break
+            self._pending += self.encode(chunk)
+
+        data = bytes(self._pending[:maxlen])
+        del self._pending[:maxlen]
+        self.m_pos += len(data)
+
+        return data
 
     def writeData(self, data) -> int:
         return 0
 
     def bytesAvailable(self) -> int:
+        if self._stream is not None:
+            if not self._pending:
+                self._pending += self.encode(next(self._stream, []))
+            return len(self._pending) + super().bytesAvailable()
         return self.buffer.size() + super().bytesAvailable()
@@ -1,7 +1,19 @@
-from PySide6.QtCore import QByteArray, QIODevice
+from dataclasses import dataclass
+from time import perf_counter
+
+import numpy as np
+from PySide6.QtCore import QIODevice
 from PySide6.QtMultimedia import QAudioFormat
 
 
+@dataclass
+class CaptureStats:
+    bytes_received: int = 0
+    callbacks: int = 0
+    max_callback_gap: float = 0.0  # time in s.
+    overflows: int = 0  # Count of reallocations beyond the reserved size.
+
+
 class Recorder(QIODevice):
     def __init__(
         self, sample_format: QAudioFormat = QAudioFormat.Int16, fs: int = 44100
@@ -18,8 +30,13 @@ class Recorder(QIODevice):
         self._audio_format.setSampleRate(self.fs)
         self._audio_format.setChannelCount(1)
         self._audio_format.setSampleFormat(self.sample_format)
-        self.buffer = QByteArray()
+        # Captured PCM data is written into a preallocated buffer, of which
+        # `self._size` bytes are used. `self.m_pos` is the read position.
+        self.buffer = np.zeros(0, dtype=np.uint8)
+        self._size = 0
         self.m_pos = 0
+        self._stats = CaptureStats()
+        self._last_callback: float | None = None
 
     @property
     def sample_format(self) -> QAudioFormat:
@@ -56,19 +73,60 @@ class Recorder(QIODevice):
 
     def set_pos(self, pos: int):
         # Set position within reasonable limits of [0, len(buffer) - 1]
-        self.m_pos = max(min(self.buffer.size() - 1, pos), 0)
+        self.m_pos = max(min(self._size - 1, pos), 0)
+
+    def reserve(self, frames: int):
+        """Discards the capture and preallocates space for `frames`, so that
+        appending does not reallocate during a recording."""
+        nbytes = frames * self.audio_format.bytesPerFrame()
+        if len(self.buffer) < nbytes:
+            self.buffer = np.zeros(nbytes, dtype=np.uint8)
+        self._size = 0
+        self.m_pos = 0
+        self._stats = CaptureStats()
+        self._last_callback = None
+
+    def append(self, data) -> int:
+        """Appends captured PCM `data` (any bytes-like object). If the reserved
+        space is exceeded, the buffer grows by half and an overflow is
+        counted."""
+        data = np.frombuffer(data, dtype=np.uint8)
+        end = self._size + len(data)
+        if end > len(self.buffer):
+            grown = np.zeros(max(end, len(self.buffer) * 3 // 2), dtype=np.uint8)
+            grown[: self._size] = self.buffer[: self._size]
+            self.buffer = grown
+            self._stats.overflows += 1
+        self.buffer[self._size : end] = data
+        self._size = end
+
+        now = perf_counter()
+        if self._last_callback is not None:
+            self._stats.max_callback_gap = max(
+                self._stats.max_callback_gap, now - self._last_callback
+            )
+        self._last_callback = now
+        self._stats.bytes_received += len(data)
+        self._stats.callbacks += 1
+
+        return len(data)
+
+    def data(self) -> np.ndarray:
+        """Captured PCM bytes as a view into the buffer."""
+        return self.buffer[: self._size]
+
+    @property
+    def capture_stats(self) -> CaptureStats:
+        return self._stats
 
     def readData(self, maxlen: int) -> bytes:
         old_pos = self.m_pos
-        self.m_pos = min(self.buffer.size(), self.m_pos + maxlen)
+        self.m_pos = min(self._size, self.m_pos + maxlen)
 
-        return self.buffer.data()[old_pos : self.m_pos]
+        return self.buffer[old_pos : self.m_pos].tobytes()
 
     def writeData(self, data, length: int) -> int:
-        self.buffer.append(data)
-        self.m_pos += length
-
-        return length
+        return self.append(memoryview(data)[:length])
 
     def bytesAvailable(self) -> int:
-        return self.buffer.size() + super().bytesAvailable()
+        return self._size - self.m_pos + super().bytesAvailable()
@@ -1,7 +1,10 @@
+from typing import Iterator
+
 import numpy as np
+from Analysis import Analysis
 from PySide6.QtCore import QObject, Signal
-from scipy import signal
 from SingleSignalModel import SingleSignalModel
+from Stimulus import Stimulus
 
 
 class SignalModel(QObject):
@@ -17,6 +20,8 @@ class SignalModel(QObject):
     _default_window_close_length: int = 200
     _default_analyser_start: int = 0
     _default_analyser_stop: int = -1
+    _default_analyser_window: str = "hann"
+    _default_spectrum_resolution: str = "1/24"
     _default_calibration_sweep: str = "linear"
     _default_calibration_duration: int = 5000
     _default_calibration_freq_start: float = 220
@@ -24,6 +29,11 @@ class SignalModel(QObject):
     _filename: str = ""
     _recorded_data: list[float] = []
     _recorded_data_bak: list[float] = []
+    _recording_revision: int = 0
+    _step_response: np.ndarray = np.zeros((0, 3))
+    _latency: int = 0
+    _calibration_result: tuple[np.ndarray, ...] = ()
+    _latency_compensation: bool = True
 
     _window_list: tuple[str] = (
         "blackmanharris",
@@ -34,7 +44,17 @@ class SignalModel(QObject):
         "gaussian",
         "tukey",
     )
+    _analyser_window_list: tuple[str] = (
+        "hann",
+        "hamming",
+        "blackmanharris",
+        "flattop",
+        "boxcar",
+    )
+    # Fractional octave bands, one band per pixel or all FFT bins.
+    _spectrum_resolution_list: tuple[str] = ("1/3", "1/12", "1/24", "pixel", "full")
     _signal_list: list[SingleSignalModel] = []
+    _stimulus: Stimulus = Stimulus(_signal_list)
     _sweep_list: tuple[str] = ("linear", "logarithmic", "hyperbolic")
     hertz_changed = Signal(float)
 
@@ -45,19 +65,56 @@ class SignalModel(QObject):
             index = len(self._signal_list)
         # Python itself handles a positive out-of-range case, so nothing to do.
         self._signal_list.insert(index, signal)
+        self._stimulus.invalidate()
 
     def remove_signal(self, index: int):
         self._signal_list.pop(index)
+        self._stimulus.invalidate()
 
     def remove_all_signals(self):
         self._signal_list.clear()
+        self._stimulus.invalidate()
+
+    def release_signals(self):
+        """Drops the computed samples of all signals to free memory. They are
+        computed again when needed."""
+        for signal in self._signal_list:
+            signal.release()
 
     def get_windows(self) -> tuple[str]:
         return self._window_list
 
+    def get_analyser_windows(self) -> tuple[str]:
+        return self._analyser_window_list
+
+    def get_spectrum_resolutions(self) -> tuple[str]:
+        return self._spectrum_resolution_list
+
     def get_signals(self) -> list[SingleSignalModel]:
         return self._signal_list
 
+    def get_stimulus(self) -> np.ndarray:
+        """All signals composed into one read-only buffer. It is only
+        recomputed after a signal was added, removed or changed."""
+        return self._stimulus.data
+
+    def get_signal_offsets(self) -> list[int]:
+        """Start frame of every signal within the stimulus, followed by the
+        total frame count."""
+        return self._stimulus.get_offsets()
+
+    def iter_stimulus(self, chunk_frames: int = 4096) -> Iterator[np.ndarray]:
+        """Yields the stimulus signal by signal in chunks of at most
+        `chunk_frames`, without composing or keeping it as a whole."""
+        for signal in list(self._signal_list):
+            for start in range(0, len(signal), chunk_frames):
+                yield signal.render(start, start + chunk_frames)
+
+    def get_steps(self) -> list[tuple[float, int, int]]:
+        """Frequency, start frame and stop frame of the steady state of every
+        signal within the stimulus."""
+        return self._stimulus.get_steps()
+
     def get_frames(self, time: int) -> int:
         """Returns frame count with given time (in ms), according to self.fs."""
         return int(time * self.fs / 1000)
@@ -66,12 +123,12 @@ class SignalModel(QObject):
         return self._sweep_list
 
     def generate_sweep(self) -> np.ndarray:
-        return signal.chirp(
-            np.linspace(0, self.calibration_duration / 1000, self.fs * self.calibration_duration // 1000),
-            f0=self.calibration_freq_start,
-            t1=self.calibration_duration / 1000,
-            f1=self.calibration_freq_stop,
-            method=self.calibration_sweep,
+        return Analysis.sweep(
+            self.calibration_sweep,
+            self.calibration_duration,
+            self.calibration_freq_start,
+            self.calibration_freq_stop,
+            self.fs,
         )
 
     def __str__(self):
@@ -175,6 +232,22 @@ class SignalModel(QObject):
     def set_analyser_stop(self, value: int):
         self._default_analyser_stop = value
 
+    @property
+    def spectrum_resolution(self) -> str:
+        return self._default_spectrum_resolution
+
+    @spectrum_resolution.setter
+    def spectrum_resolution(self, value: str):
+        self._default_spectrum_resolution = value
+
+    @property
+    def analyser_window(self) -> str:
+        return self._default_analyser_window
+
+    @analyser_window.setter
+    def analyser_window(self, value: str):
+        self._default_analyser_window = value.lower()
+
     @property
     def calibration_sweep(self) -> str:
         return self._default_calibration_sweep
@@ -214,3 +287,47 @@ class SignalModel(QObject):
     @recorded_data.setter
     def recorded_data(self, value: list[float]):
         self._recorded_data = value
+        self._recording_revision += 1
+
+    @property
+    def recording_revision(self) -> int:
+        """Changes with every new recording, so results can be cached."""
+        return self._recording_revision
+
+    @property
+    def step_response(self) -> np.ndarray:
+        """Rows of frequency, amplitude and phase of every step."""
+        return self._step_response
+
+    @step_response.setter
+    def step_response(self, value: np.ndarray):
+        self._step_response = value
+
+    @property
+    def latency(self) -> int:
+        """Estimated round-trip latency in frames of the last recording."""
+        return self._latency
+
+    @latency.setter
+    def latency(self, value: int):
+        self._latency = value
+
+    @property
+    def latency_compensation(self) -> bool:
+        """Whether the analysis starts `latency` frames into the recording, so
+        that it lines up with the stimulus."""
+        return self._latency_compensation
+
+    @latency_compensation.setter
+    def latency_compensation(self, value: bool):
+        self._latency_compensation = value
+
+    @property
+    def calibration_result(self) -> tuple[np.ndarray, ...]:
+        """Impulse response, frequencies and frequency response of the last
+        calibration, see Analysis.deconvolve_sweep."""
+        return self._calibration_result
+
+    @calibration_result.setter
+    def calibration_result(self, value: tuple[np.ndarray, ...]):
+        self._calibration_result = value
@@ -1,6 +1,6 @@
 import numpy as np
 from dataclasses import dataclass
-from scipy import signal
+from WindowCache import WindowCache
 
 
 @dataclass
@@ -23,30 +23,10 @@ class SingleSignalModel:
         # inbetween, so that it resembles _/'''\_.
         # Before and after there is the start and stop offset (a null signal).
         # The windows are added to the main signal, thus are exclusive.
-        window_function = (("gauss", self.sigma)
-                           if "gauss" in self.window_function
-                           else self.window_function)
-        window_open = signal.windows.get_window(
-            window_function,
-            self.window_open_length * self.fs * 2 // 1000,
-            fftbins=False)[:self.window_open_length * self.fs // 1000]
-        ones = [1.0 for _ in range(self.duration * self.fs // 1000)]
-        window_close = signal.windows.get_window(
-            window_function,
-            self.window_close_length * self.fs * 2 // 1000,
-            fftbins=False)[self.window_close_length * self.fs // 1000:]
-        window = np.concatenate([window_open, ones, window_close])
-        window_length = (
-            self.window_open_length + self.duration + self.window_close_length)
-        unwindowed_signal = np.sin(
-            2 * np.pi * self.hertz *
-            np.linspace(
-                0, window_length / 1000, self.fs * window_length // 1000))
-
-        self._data = np.concatenate([
-            [0 for _ in range(self.start_offset * self.fs // 1000)],
-            [y * w for y, w in zip(unwindowed_signal, window)],
-            [0 for _ in range(self.stop_offset * self.fs // 1000)]])
+        # The samples are only computed when `data` is first accessed.
+        self._data: np.ndarray | None = None
+        # Counts changes of the samples, so that users can detect them.
+        self._revision = 0
 
         self._window_list: tuple[str] = (
             "blackmanharris", "bartlett", "boxcar",
@@ -56,20 +36,164 @@ class SingleSignalModel:
         """Alter multiple class attributes at once to reduce computation
         overhead. This method will only alter attributes which do exist.
 
-        After alteration the new signal will be computed."""
+        Afterwards only the affected segments are computed again: offsets
+        only move the tone, ramp changes only render that ramp and a change of
+        fs, frequency or duration renders the whole tone. If nothing changed
+        or no samples were computed yet, nothing is done."""
 
-        for key, value in attributes.items():
-            if key not in self.__dict__:
-                continue
-            self.__dict__[key] = value
+        changed = {
+            key for key, value in attributes.items()
+            if key in self.__dict__ and self.__dict__[key] != value}
+        if not changed:
+            return
 
-        self.__post_init__()
+        old_layout = self.get_layout()
+        for key in changed:
+            self.__dict__[key] = attributes[key]
+        self._revision += 1
+
+        if self._data is None:
+            return
+
+        if changed & {"fs", "hertz", "duration"}:
+            self._data = self._synthesize()
+            return
+
+        window_changed = "window_function" in changed or (
+            "sigma" in changed and "gauss" in self.window_function)
+        render = {
+            1: window_changed or "window_open_length" in changed,
+            3: window_changed or "window_close_length" in changed}
+        layout = self.get_layout()
+
+        if layout == old_layout:
+            data = self._data
+        else:
+            data = np.zeros(sum(layout))
+            for index in (1, 2, 3):
+                if index == 2 or not render[index]:
+                    self._segment(data, index)[:] = self._segment(
+                        self._data, index, old_layout)
+
+        if render[1]:
+            self._render_open(self._segment(data, 1))
+        if render[3]:
+            self._render_close(self._segment(data, 3))
+
+        self._data = data
+
+    def release(self):
+        """Drops the computed samples, e.g. under memory pressure. They are
+        computed again on the next access of `data`."""
+        self._data = None
+
+    @property
+    def revision(self) -> int:
+        return self._revision
+
+    @property
+    def materialized(self) -> bool:
+        return self._data is not None
+
+    def __len__(self) -> int:
+        """Frame count of the signal; does not compute any samples."""
+        return sum(self.get_layout())
+
+    def render_into(self, out: np.ndarray):
+        """Writes all samples into `out` of `len(self)` frames, e.g. a slice
+        of a larger buffer. Unless the signal is already computed, nothing is
+        kept, so its samples are only held in `out`."""
+        if self._data is not None:
+            out[:] = self._data
+            return
+
+        out.fill(0)
+        self._render_segments(out)
+
+    def render(self, start: int, stop: int) -> np.ndarray:
+        """Samples `start` up to `stop` (in frames). Unless the whole signal
+        is already computed, only this range is computed and nothing is kept,
+        which allows streaming a signal in chunks."""
+        if self._data is not None:
+            return self._data[start:stop]
+
+        stop = min(stop, len(self))
+        out = np.zeros(max(0, stop - start))
+        layout = self.get_layout()
+        renderers = {1: self._render_open, 2: self._render_plateau,
+                     3: self._render_close}
+        for index, render in renderers.items():
+            segment_start = sum(layout[:index])
+            low = max(start, segment_start)
+            high = min(stop, segment_start + layout[index])
+            if low < high:
+                render(out[low - start:high - start], low - segment_start)
+
+        return out
+
+    def get_layout(self) -> tuple[int, int, int, int, int]:
+        """Frame counts of start offset, opening ramp, plateau, closing ramp
+        and stop offset."""
+        return (
+            self.start_offset * self.fs // 1000,
+            self.window_open_length * self.fs // 1000,
+            self.duration * self.fs // 1000,
+            len(WindowCache.close_ramp(
+                self.window_function, self.sigma,
+                self.window_close_length, self.fs)),
+            self.stop_offset * self.fs // 1000)
+
+    def _synthesize(self) -> np.ndarray:
+        # The sine is sampled on the fs grid with its phase origin at the
+        # start of the plateau, so every segment can be rendered on its own.
+        data = np.zeros(sum(self.get_layout()))
+        self._render_segments(data)
+
+        return data
+
+    def _render_segments(self, data: np.ndarray):
+        # The offsets before and after the tone are left as they are.
+        self._render_open(self._segment(data, 1))
+        self._render_plateau(self._segment(data, 2))
+        self._render_close(self._segment(data, 3))
+
+    def _segment(self, data: np.ndarray, index: int,
+                 layout: tuple[int, ...] | None = None) -> np.ndarray:
+        layout = self.get_layout() if layout is None else layout
+        start = sum(layout[:index])
+        return data[start:start + layout[index]]
+
+    def _render_tone(self, out: np.ndarray, first_frame: int):
+        # sin(2 * pi * f * n / fs), computed in place; n = 0 starts the plateau.
+        out[:] = np.arange(first_frame, first_frame + len(out))
+        np.multiply(out, 2 * np.pi * self.hertz / self.fs, out=out)
+        np.sin(out, out=out)
+
+    # `offset` is the position of `out` within its segment, so that parts of a
+    # segment can be rendered as well.
+    def _render_open(self, out: np.ndarray, offset: int = 0):
+        self._render_tone(
+            out, offset - self.window_open_length * self.fs // 1000)
+        out *= WindowCache.open_ramp(
+            self.window_function, self.sigma, self.window_open_length,
+            self.fs)[offset:offset + len(out)]
+
+    def _render_plateau(self, out: np.ndarray, offset: int = 0):
+        self._render_tone(out, offset)
+
+    def _render_close(self, out: np.ndarray, offset: int = 0):
+        self._render_tone(out, offset + self.duration * self.fs // 1000)
+        out *= WindowCache.close_ramp(
+            self.window_function, self.sigma, self.window_close_length,
+            self.fs)[offset:offset + len(out)]
 
     def get_windows(self) -> list[str]:
         return self._window_list
 
     @property
-    def data(self) -> list[float]:
+    def data(self) -> np.ndarray:
+        if self._data is None:
+            self._data = self._synthesize()
         return self._data
 
     @property
@@ -0,0 +1,92 @@
+import numpy as np
+from SingleSignalModel import SingleSignalModel
+
+
+class Stimulus:
+    """All signals of a list composed into one buffer, as they are played.
+
+    The buffer is only touched when a signal was added, removed or updated.
+    A signal whose length did not change is patched in place, everything else
+    composes the buffer again. The signals render into the buffer directly,
+    so their samples are not kept a second time. `data` is a read-only view,
+    so playback and plotting never copy it.
+    """
+
+    def __init__(self, signals: list[SingleSignalModel]):
+        # The list is owned by the caller and may change at any time.
+        self._signals = signals
+        self._composed: list[tuple[SingleSignalModel, int]] = []
+        self._offsets: list[int] = [0]
+        self._buffer = np.zeros(0)
+        self._view = self._read_only(self._buffer)
+        self._dirty = True
+
+    @property
+    def data(self) -> np.ndarray:
+        self._refresh()
+        return self._view
+
+    def get_offsets(self) -> list[int]:
+        """Start frame of every signal followed by the total frame count."""
+        self._refresh()
+        return self._offsets
+
+    def get_steps(self) -> list[tuple[float, int, int]]:
+        """Frequency, start frame and stop frame of the plateau of every
+        signal, i.e. its steady state, within the stimulus. Does not compose
+        the buffer."""
+        steps = []
+        offset = 0
+        for signal in self._signals:
+            start_offset, window_open, plateau, _, _ = signal.get_layout()
+            start = offset + start_offset + window_open
+            steps.append((signal.hertz, start, start + plateau))
+            offset += len(signal)
+
+        return steps
+
+    def compose(self):
+        """Composes the buffer now instead of on the next access."""
+        self._refresh()
+
+    def invalidate(self):
+        self._dirty = True
+
+    def _refresh(self):
+        if (
+            self._dirty
+            or len(self._composed) != len(self._signals)
+            or any(s is not c for s, (c, _) in zip(self._signals, self._composed))
+        ):
+            self._compose()
+            return
+
+        for index, (signal, revision) in enumerate(self._composed):
+            if signal.revision == revision:
+                continue
+            start, stop = self._offsets[index], self._offsets[index + 1]
+            if len(signal) != stop - start:
+                self._compose()
+                return
+            signal.render_into(self._buffer[start:stop])
+            self._composed[index] = (signal, signal.revision)
+
+    def _compose(self):
+        self._offsets = [0]
+        for signal in self._signals:
+            self._offsets.append(self._offsets[-1] + len(signal))
+
+        self._buffer = np.empty(self._offsets[-1])
+        for index, signal in enumerate(self._signals):
+            signal.render_into(
+                self._buffer[self._offsets[index] : self._offsets[index + 1]]
+            )
+        self._view = self._read_only(self._buffer)
+        self._composed = [(s, s.revision) for s in self._signals]
+        self._dirty = False
+
+    @staticmethod
+    def _read_only(data: np.ndarray) -> np.ndarray:
+        view = data.view()
+        view.flags.writeable = False
+        return view
@@ -1,7 +1,13 @@
+from typing import Callable
+
 import numpy as np
 import pyqtgraph as pg
+from Analysis import Analysis
+from AnalysisCache import AnalysisCache
+from AnalysisWorker import AnalysisWorker
 from Controller import Controller
-from PySide6.QtCore import QCoreApplication, QLocale, Qt
+from DecimatedCurve import DecimatedCurve
+from PySide6.QtCore import QCoreApplication, QLocale, QRectF, Qt, QTimer
 from PySide6.QtGui import (
     QAction,
     QDoubleValidator,
@@ -17,15 +23,17 @@ from PySide6.QtWidgets import (
     QLabel,
     QLineEdit,
     QMainWindow,
+    QProgressBar,
     QPushButton,
     QScrollArea,
+    QTableWidget,
+    QTableWidgetItem,
     QTabWidget,
     QVBoxLayout,
     QWidget,
 )
-from PySide6.QtMultimedia import QAudioFormat
-from scipy.fft import fft
-from scipy.signal.windows import hann
+from PySide6.QtMultimedia import QAudioDevice, QAudioFormat
+from MinMaxPyramid import MinMaxPyramid
 from SignalModel import SignalModel
 from SingleLineEdit import SingleLineEdit
 from SingleSignalModel import SingleSignalModel
@@ -41,6 +49,15 @@ class View(QMainWindow):
 
         self._model = model
         self._controller = controller
+        self.analysis_worker = AnalysisWorker(self)
+        self.analysis_worker.result_ready.connect(self.show_sink_graphs)
+        # The deconvolution of a calibration must not be made stale by the
+        # analysis of the same recording, so it has a worker of its own.
+        self.calibration_worker = AnalysisWorker(self)
+        self.calibration_worker.result_ready.connect(self.show_calibration_graphs)
+        # Results of analysed intervals, so that going back to one is instant.
+        # Only results of the current recording are kept.
+        self.analysis_cache = AnalysisCache()
 
         _ = Qt.AlignmentFlag.AlignTop
 
@@ -92,62 +109,56 @@ class View(QMainWindow):
         file_menu.addAction(menu_quit_action)
         file_menu.addAction(menu_refresh_action)
 
-        # Input / Output section.
+        # Input / Output section. Only the current devices and formats are
+        # shown until `probe_devices` runs after the window is shown, since
+        # enumerating and probing the devices takes a while.
         input_select_layout = QHBoxLayout()
         input_select_label = QLabel("Eingabegerät: ")
         input_select_label.setAlignment(Qt.AlignmentFlag.AlignHCenter)
-        input_select = QComboBox()
-        for device_info in self.controller.get_audio_inputs():
-            input_select.addItem(device_info.description(), device_info)
-        input_select.currentIndexChanged.connect(self.controller.set_input_device)
-        input_select.setToolTip("Eingabegerät zur Aufnahme")
+        self.input_select = QComboBox()
+        self.input_select.addItem(self.controller.input_device.description())
+        self.input_select.setToolTip("Eingabegerät zur Aufnahme")
         input_select_label.setToolTip("Eingabegerät zur Aufnahme")
-        input_select_label.setBuddy(input_select)
+        input_select_label.setBuddy(self.input_select)
         input_select_layout.addWidget(input_select_label)
-        input_select_layout.addWidget(input_select, stretch=1)
+        input_select_layout.addWidget(self.input_select, stretch=1)
 
         input_fs_select_layout = QHBoxLayout()
         input_fs_select_label = QLabel("Sample-Rate:  ")
         input_fs_select_label.setAlignment(Qt.AlignmentFlag.AlignHCenter)
-        input_fs_select = QComboBox()
-        for fs in self.controller.supported_audio_formats(self.controller.input_device):
-            input_fs_select.addItem(f"{fs.sampleRate()} Hz", fs)
-        input_fs_select.currentIndexChanged.connect(self.controller.set_input_format)
-        # TODO: setCurrentIndex needs to be in the preferred format, but only with 1 channel.
-        input_fs_select.setCurrentIndex(1)
-        input_fs_select.setToolTip("Sample-Rate für Aufnahme")
+        self.input_fs_select = QComboBox()
+        self.input_fs_select.addItem(
+            self.format_text(self.controller.recorder.audio_format)
+        )
+        self.input_fs_select.setToolTip("Sample-Rate für Aufnahme")
         input_fs_select_label.setToolTip("Sample-Rate für Aufnahme")
-        input_fs_select_label.setBuddy(input_fs_select)
+        input_fs_select_label.setBuddy(self.input_fs_select)
         input_fs_select_layout.addWidget(input_fs_select_label)
-        input_fs_select_layout.addWidget(input_fs_select, stretch=1)
+        input_fs_select_layout.addWidget(self.input_fs_select, stretch=1)
 
         output_select_layout = QHBoxLayout()
         output_select_label = QLabel("Ausgabegerät: ")
         output_select_label.setAlignment(Qt.AlignmentFlag.AlignHCenter)
-        output_select = QComboBox()
-        for device_info in self.controller.get_audio_outputs():
-            output_select.addItem(device_info.description(), device_info)
-        output_select.currentIndexChanged.connect(self.controller.set_output_device)
-        output_select.setToolTip("Ausgabegerät zur Wiedergabe")
+        self.output_select = QComboBox()
+        self.output_select.addItem(self.controller.output_device.description())
+        self.output_select.setToolTip("Ausgabegerät zur Wiedergabe")
         output_select_label.setToolTip("Ausgabegerät zur Wiedergabe")
-        output_select_label.setBuddy(output_select)
+        output_select_label.setBuddy(self.output_select)
         output_select_layout.addWidget(output_select_label)
-        output_select_layout.addWidget(output_select, stretch=1)
+        output_select_layout.addWidget(self.output_select, stretch=1)
 
         output_fs_select_layout = QHBoxLayout()
         output_fs_select_label = QLabel("Sample-Rate:   ")
         output_fs_select_label.setAlignment(Qt.AlignmentFlag.AlignHCenter)
-        output_fs_select = QComboBox()
-        for fs in self.controller.supported_audio_formats(self.controller.output_device):
-            output_fs_select.addItem(f"{fs.sampleRate()} Hz", fs)
-        output_fs_select.currentIndexChanged.connect(self.controller.set_output_format)
-        # TODO: setCurrentIndex needs to be in the preferred format, but only with 1 channel.
-        output_fs_select.setCurrentIndex(1)
-        output_fs_select.setToolTip("Sample-Rate für Wiedergabe")
+        self.output_fs_select = QComboBox()
+        self.output_fs_select.addItem(
+            self.format_text(self.controller.player.audio_format)
+        )
+        self.output_fs_select.setToolTip("Sample-Rate für Wiedergabe")
         output_fs_select_label.setToolTip("Sample-Rate für Wiedergabe")
-        output_fs_select_label.setBuddy(output_fs_select)
+        output_fs_select_label.setBuddy(self.output_fs_select)
         output_fs_select_layout.addWidget(output_fs_select_label)
-        output_fs_select_layout.addWidget(output_fs_select, stretch=1)
+        output_fs_select_layout.addWidget(self.output_fs_select, stretch=1)
         # graph  |  graph3
         # =output|  =input
         # ----------------
@@ -160,31 +171,57 @@ class View(QMainWindow):
         self.graphWidget.getAxis("left").setLabel("Amplitude")
         self.graphWidget.getAxis("bottom").setLabel("Zeit", "s")
         self.graphWidgetPlot = self.graphWidget.plot(pen="r")
+        self.graphWidgetCurve = DecimatedCurve(self.graphWidget, self.graphWidgetPlot)
         graphHeadline = QLabel("Abfragesignal")
         graphHeadline.setAlignment(Qt.AlignmentFlag.AlignHCenter)
 
         self.graph2 = pg.GraphicsLayoutWidget()
         self.graph2Widget = pg.PlotWidget(background="w")
         self.graph2Widget.showGrid(x=True, y=True)
-        self.graph2Widget.setLogMode(y=True)
+        self.graph2Widget.setLogMode(x=True, y=True)
         self.graph2Widget.getAxis("left").setLabel("Amplitude")
         self.graph2Widget.getAxis("bottom").setLabel("Frequenz", "Hz")
         self.graph2WidgetPlot = self.graph2Widget.plot(pen="r")
         graph2Headline = QLabel("Spektrum des Abfragesignals")
         graph2Headline.setAlignment(Qt.AlignmentFlag.AlignHCenter)
 
+        # Live view while recording: levels and a rolling spectrogram.
+        self.peak_meter = QProgressBar()
+        self.peak_meter.setRange(-60, 0)
+        self.peak_meter.setFormat("Peak: %v dBFS")
+        self.peak_meter.setToolTip("Spitzenpegel der laufenden Aufnahme")
+        self.rms_meter = QProgressBar()
+        self.rms_meter.setRange(-60, 0)
+        self.rms_meter.setFormat("RMS: %v dBFS")
+        self.rms_meter.setToolTip("Effektivpegel der laufenden Aufnahme")
+        level_layout = QHBoxLayout()
+        level_layout.addWidget(self.peak_meter)
+        level_layout.addWidget(self.rms_meter)
+
+        self.live_widget = pg.PlotWidget(background="w")
+        self.live_widget.setMaximumHeight(160)
+        self.live_widget.getAxis("left").setLabel("Frequenz", "Hz")
+        self.live_widget.getAxis("bottom").setLabel("Zeit", "s")
+        self.live_image = pg.ImageItem()
+        self.live_image.setColorMap(pg.colormap.get("viridis"))
+        self.live_widget.addItem(self.live_image)
+        self.live_timer = QTimer(self)
+        self.live_timer.setInterval(50)  # Limits the GUI updates to 20 Hz.
+        self.live_timer.timeout.connect(self.update_live_view)
+
         self.graph3 = pg.GraphicsLayoutWidget()
         self.graph3Widget = pg.PlotWidget(background="w")
         self.graph3Widget.showGrid(x=True, y=True)
         self.graph3Widget.getAxis("bottom").setLabel("Zeit", "s")
         self.graph3WidgetPlot = self.graph3Widget.plot(pen="r")
+        self.graph3WidgetCurve = DecimatedCurve(self.graph3Widget, self.graph3WidgetPlot)
         graph3Headline = QLabel("Antwortsignal")
         graph3Headline.setAlignment(Qt.AlignmentFlag.AlignHCenter)
 
         self.graph4 = pg.GraphicsLayoutWidget()
         self.graph4Widget = pg.PlotWidget(background="w")
         self.graph4Widget.showGrid(x=True, y=True)
-        self.graph4Widget.setLogMode(y=True)
+        self.graph4Widget.setLogMode(x=True, y=True)
         self.graph4Widget.getAxis("bottom").setLabel("Frequenz", "Hz")
         self.graph4WidgetPlot = self.graph4Widget.plot(pen="r")
         graph4Headline = QLabel("Spektrum des Antwortsignals")
@@ -305,6 +342,38 @@ class View(QMainWindow):
         analyse_stop_row.addWidget(analyse_stop_picker)
         analyse_stop_row.addWidget(analyse_stop_label)
 
+        analyse_window_select = QComboBox()
+        analyse_window_select.addItems(
+            [wf.capitalize() for wf in self.model.get_analyser_windows()]
+        )
+        analyse_window_select.setCurrentIndex(
+            self.model.get_analyser_windows().index(self.model.analyser_window)
+        )
+        analyse_window_select.setToolTip("Fensterfunktion für die Analyse")
+        analyse_window_select.currentTextChanged.connect(
+            self.set_analyser_window
+        )
+
+        spectrum_resolution_select = QComboBox()
+        for resolution in self.model.get_spectrum_resolutions():
+            spectrum_resolution_select.addItem(
+                {"pixel": "Ein Band pro Pixel", "full": "Alle FFT-Bins"}.get(
+                    resolution, f"{resolution} Oktave"
+                ),
+                resolution,
+            )
+        spectrum_resolution_select.setCurrentIndex(
+            self.model.get_spectrum_resolutions().index(
+                self.model.spectrum_resolution
+            )
+        )
+        spectrum_resolution_select.setToolTip("Frequenzauflösung der Spektren")
+        spectrum_resolution_select.currentIndexChanged.connect(
+            lambda i: self.set_spectrum_resolution(
+                spectrum_resolution_select.itemData(i)
+            )
+        )
+
         button_set_analyse_interval = QPushButton("Anwenden")
         button_set_analyse_interval.clicked.connect(
             lambda: self.set_analyser_interval(
@@ -328,12 +397,38 @@ class View(QMainWindow):
                 analyse_start_picker, analyse_stop_picker, x.getRegion()
             )
         )
+        region.sigRegionChanged.connect(
+            lambda x: self.preview_sink_spectrum(
+                *(int(xy * 1000) for xy in x.getRegion())
+            )
+        )
 
         check_region = QCheckBox("Auswahlfenster (experimentell)")
         check_region.setChecked(False)
         check_region.clicked.connect(lambda b: self.graph3Widget.addItem(region) if b else self.graph3Widget.removeItem(region))
         # self.graph3Widget.addItem(region)
 
+        check_latency = QCheckBox("Latenz ausgleichen")
+        check_latency.setChecked(self.model.latency_compensation)
+        check_latency.setToolTip(
+            "Analyse ab dem Eintreffen des Abfragesignals in der Aufnahme"
+        )
+        check_latency.clicked.connect(self.set_latency_compensation)
+        self.latency_label = QLabel("Latenz: -")
+        button_reset_latency = QPushButton("Latenz neu schätzen")
+        button_reset_latency.setToolTip(
+            "Latenz bei der nächsten Aufnahme für die Geräte neu bestimmen"
+        )
+        button_reset_latency.clicked.connect(self.controller.reset_latency)
+
+        # Amplitude and phase at the frequency of every step.
+        self.step_table = QTableWidget(0, 3)
+        self.step_table.setHorizontalHeaderLabels(
+            ["Frequenz [Hz]", "Amplitude", "Phase [°]"]
+        )
+        self.step_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.step_table.setToolTip("Antwort im eingeschwungenen Zustand jedes Signals")
+
         # Calibration
         calibration_sweep_select = QComboBox()
         calibration_sweep_select.addItems(
@@ -375,9 +470,25 @@ class View(QMainWindow):
             )
         )
         button_set_calibration = QPushButton("Sweep Wiedergabe / Aufnahme")
-        button_set_calibration.clicked.connect(
-            lambda: self.controller.play_record(self.model.generate_sweep())
+        button_set_calibration.clicked.connect(self.controller.play_calibration)
+
+        self.impulse_response_widget = pg.PlotWidget(background="w")
+        self.impulse_response_widget.showGrid(x=True, y=True)
+        self.impulse_response_widget.getAxis("bottom").setLabel("Zeit", "s")
+        self.impulse_response_plot = self.impulse_response_widget.plot(pen="r")
+        self.impulse_response_curve = DecimatedCurve(
+            self.impulse_response_widget, self.impulse_response_plot
         )
+        impulse_response_headline = QLabel("Impulsantwort")
+        impulse_response_headline.setAlignment(Qt.AlignmentFlag.AlignHCenter)
+
+        self.frequency_response_widget = pg.PlotWidget(background="w")
+        self.frequency_response_widget.showGrid(x=True, y=True)
+        self.frequency_response_widget.setLogMode(x=True, y=True)
+        self.frequency_response_widget.getAxis("bottom").setLabel("Frequenz", "Hz")
+        self.frequency_response_plot = self.frequency_response_widget.plot(pen="r")
+        frequency_response_headline = QLabel("Frequenzgang")
+        frequency_response_headline.setAlignment(Qt.AlignmentFlag.AlignHCenter)
 
         # Putting everything together.
         self.signal_layout.setAlignment(Qt.AlignmentFlag.AlignTop)
@@ -396,9 +507,15 @@ class View(QMainWindow):
         self.analysis_layout.setAlignment(Qt.AlignmentFlag.AlignTop)
         self.analysis_layout.addLayout(analyse_start_row)
         self.analysis_layout.addLayout(analyse_stop_row)
+        self.analysis_layout.addWidget(analyse_window_select)
+        self.analysis_layout.addWidget(spectrum_resolution_select)
         self.analysis_layout.addWidget(button_set_analyse_interval)
         self.analysis_layout.addWidget(button_reset_analyse_interval)
         self.analysis_layout.addWidget(check_region)
+        self.analysis_layout.addWidget(check_latency)
+        self.analysis_layout.addWidget(self.latency_label)
+        self.analysis_layout.addWidget(button_reset_latency)
+        self.analysis_layout.addWidget(self.step_table)
 
         self.calibration_layout.setAlignment(Qt.AlignmentFlag.AlignTop)
         self.calibration_layout.addWidget(calibration_sweep_select)
@@ -407,6 +524,10 @@ class View(QMainWindow):
         self.calibration_layout.addLayout(calibration_freq_stop)
         self.calibration_layout.addWidget(button_change_calibration)
         self.calibration_layout.addWidget(button_set_calibration)
+        self.calibration_layout.addWidget(impulse_response_headline)
+        self.calibration_layout.addWidget(self.impulse_response_widget)
+        self.calibration_layout.addWidget(frequency_response_headline)
+        self.calibration_layout.addWidget(self.frequency_response_widget)
 
         self.first_column.addLayout(output_select_layout)
         self.first_column.addLayout(output_fs_select_layout)
@@ -416,6 +537,8 @@ class View(QMainWindow):
         self.first_column.addWidget(self.graph2Widget)
         self.second_column.addLayout(input_select_layout)
         self.second_column.addLayout(input_fs_select_layout)
+        self.second_column.addLayout(level_layout)
+        self.second_column.addWidget(self.live_widget)
         self.second_column.addWidget(graph3Headline)
         self.second_column.addWidget(self.graph3Widget)
         self.second_column.addWidget(graph4Headline)
@@ -430,10 +553,19 @@ class View(QMainWindow):
         # buttons = QVBoxLayout()
         play_button = QPushButton("Wiedergabe / Aufnahme")
         play_button.clicked.connect(self.controller.play_record)
+        check_streaming = QCheckBox("Streaming-Wiedergabe")
+        check_streaming.setChecked(self.controller.streaming)
+        check_streaming.setToolTip(
+            "Signale während der Wiedergabe erzeugen, statt vorab vollständig"
+        )
+        check_streaming.clicked.connect(self.controller.set_streaming)
         reset_button = QPushButton("Audio zurücksetzen")
         reset_button.clicked.connect(self.controller.reset_player)
         export_button = QPushButton("Audio exportieren")
         export_button.clicked.connect(self.menu_file_export_dialog)
+        self.signal_layout.addWidget(
+            check_streaming, alignment=Qt.AlignmentFlag.AlignBottom
+        )
         self.signal_layout.addWidget(
             play_button, alignment=Qt.AlignmentFlag.AlignBottom
         )
@@ -538,49 +670,333 @@ class View(QMainWindow):
         self.controller.set_analyser_interval(int(start), int(stop))
         self.update_sink_graphs()
 
+    def set_latency_compensation(self, value: bool):
+        self.controller.set_latency_compensation(value)
+        self.update_sink_graphs()
+
+    def set_spectrum_resolution(self, resolution: str):
+        self.controller.set_spectrum_resolution(resolution)
+        self.update_source_graphs()
+        self.update_sink_graphs()
+
+    def set_analyser_window(self, window: str):
+        self.controller.set_analyser_window(window)
+        self.update_sink_graphs()
+
     def set_analyser_text_wrapper(
         self, start_field: QLineEdit, stop_field: QLineEdit, coords: tuple[float]
     ):
         start_field.setText(f"{int(coords[0] * 1000)}")
         stop_field.setText(f"{int(coords[1] * 1000)}")
 
+    @staticmethod
+    def format_text(audio_format: QAudioFormat) -> str:
+        return f"{audio_format.sampleRate()} Hz, {audio_format.sampleFormat().name}"
+
+    def probe_devices(self, finished: Callable[[], None] | None = None):
+        """Fills the device and format selections, once after the window is
+        shown, and calls `finished` afterwards.
+
+        Qt Multimedia's devices are not meant to be used from other threads,
+        so the probing runs on the GUI thread, but in one step per selection
+        with a turn of the event loop in between. The window stays responsive
+        except for the enumeration or probing of a single device."""
+        steps = [
+            lambda: self._fill_device_select(
+                self.input_select,
+                self.controller.get_audio_inputs(),
+                self.controller.input_device,
+                self.controller.set_input_device,
+            ),
+            lambda: self._fill_device_select(
+                self.output_select,
+                self.controller.get_audio_outputs(),
+                self.controller.output_device,
+                self.controller.set_output_device,
+            ),
+            lambda: self._fill_format_select(
+                self.input_fs_select,
+                self.controller.input_device,
+                self.controller.recorder.audio_format,
+                self.controller.set_input_format,
+            ),
+            lambda: self._fill_format_select(
+                self.output_fs_select,
+                self.controller.output_device,
+                self.controller.player.audio_format,
+                self.controller.set_output_format,
+            ),
+        ]
+        if finished is not None:
+            steps.append(finished)
+
+        def run_next():
+            steps.pop(0)()
+            if steps:
+                QTimer.singleShot(0, run_next)
+
+        QTimer.singleShot(0, run_next)
+
+    @staticmethod
+    def _fill_device_select(
+        select: QComboBox,
+        devices: list[QAudioDevice],
+        current: QAudioDevice,
+        handler: Callable[[int], None],
+    ):
+        select.blockSignals(True)
+        select.clear()
+        for device_info in devices:
+            select.addItem(device_info.description(), device_info)
+            if device_info.id() == current.id():
+                select.setCurrentIndex(select.count() - 1)
+        select.blockSignals(False)
+        select.currentIndexChanged.connect(handler)
+
+    def _fill_format_select(
+        self,
+        select: QComboBox,
+        device: QAudioDevice,
+        audio_format: QAudioFormat,
+        handler: Callable[[int], None],
+    ):
+        select.blockSignals(True)
+        select.clear()
+        for fs in self.controller.supported_audio_formats(device):
+            select.addItem(self.format_text(fs), fs)
+        select.setCurrentIndex(max(0, select.findText(self.format_text(audio_format))))
+        select.blockSignals(False)
+        select.currentIndexChanged.connect(handler)
+
+    def start_live_view(self):
+        self.live_timer.start()
+
+    def stop_live_view(self):
+        self.live_timer.stop()
+        self.update_live_view()
+
+    def update_live_view(self):
+        analyser = self.controller.live_analyser
+        peak, rms = analyser.take_levels()
+        self.peak_meter.setValue(max(-60, round(peak)))
+        self.rms_meter.setValue(max(-60, round(rms)))
+
+        spectrogram = analyser.spectrogram()
+        self.live_image.setImage(spectrogram, autoLevels=False, levels=(-100, 0))
+        self.live_image.setRect(
+            QRectF(
+                -len(spectrogram) * analyser.hop / analyser.fs,
+                0,
+                len(spectrogram) * analyser.hop / analyser.fs,
+                analyser.fs / 2,
+            )
+        )
+
     def update_source_graphs(self):
         # We want to update `graph` and `graph2` here.
         if not len(self.model.get_signals()):
-            self.graphWidgetPlot.setData([], [])
+            self.graphWidgetCurve.clear()
             self.graph2WidgetPlot.setData([], [])
 
             return
 
-        data = np.concatenate([x.data for x in self.model.get_signals()])
-        data_range = np.linspace(0, len(data) / self.model.fs, len(data))
-        data_fft = fft(data)
-        data_fft = data_fft[: len(data_fft) // 2]
-        data_fft_range = np.linspace(0, self.model.fs // 2, len(data_fft))
+        data = self.model.get_stimulus()
+        data_fft_range, data_fft = self.reduce_spectrum(
+            *Analysis.spectrum(data, self.model.fs),
+            self.model.fs,
+            self.model.spectrum_resolution,
+            self.graph2Widget.width(),
+        )
+
+        self.graphWidgetCurve.set_data(data, self.model.fs)
+        self.graph2WidgetPlot.setData(data_fft_range, data_fft)
+
+    def update_calibration_graphs(self):
+        # The deconvolution runs in `self.calibration_worker`, which calls
+        # `show_calibration_graphs`.
+        if not len(self.model.recorded_data):
+            self.calibration_worker.cancel()
+            self.impulse_response_curve.clear()
+            self.frequency_response_plot.setData([], [])
+            self.model.calibration_result = ()
+
+            return
+
+        self.calibration_worker.submit(
+            self.calculate_calibration_graphs,
+            self.model.recorded_data,
+            self.model.calibration_sweep,
+            self.model.calibration_duration,
+            self.model.calibration_freq_start,
+            self.model.calibration_freq_stop,
+            self.model.fs,
+            self.model.spectrum_resolution,
+            self.frequency_response_widget.width(),
+        )
+
+    @staticmethod
+    def calculate_calibration_graphs(
+        data: np.ndarray,
+        sweep: str,
+        duration: int,
+        f_start: float,
+        f_stop: float,
+        fs: int,
+        resolution: str,
+        pixels: int,
+    ) -> tuple:
+        # Runs outside of the GUI thread, so it must not touch any widget.
+        calibration_result = Analysis.deconvolve_sweep(
+            data, sweep, duration, f_start, f_stop, fs
+        )
+        impulse_response, frequencies, frequency_response = calibration_result
+
+        return (
+            calibration_result,
+            MinMaxPyramid(impulse_response, fs),
+            *View.reduce_spectrum(
+                frequencies, frequency_response, fs, resolution, pixels
+            ),
+        )
+
+    def show_calibration_graphs(self, result: tuple):
+        calibration_result, pyramid, frequencies, frequency_response = result
 
-        self.graphWidgetPlot.setData(data_range, data)
-        self.graph2WidgetPlot.setData(data_fft_range, abs(data_fft))
+        self.model.calibration_result = calibration_result
+        self.impulse_response_curve.set_data(pyramid)
+        self.frequency_response_plot.setData(frequencies, frequency_response)
 
     def update_sink_graphs(self):
-        # TODO: Move calulations away from here, e.g. in a seperate functions.py file.
-        # TODO: make window changeable.
-        # We want to update `graph3` and `graph4` here.
+        # We want to update `graph3` and `graph4` here. The calculation runs
+        # in `self.analysis_worker`, which calls `show_sink_graphs`.
         if not len(self.model.recorded_data):
-            self.graph3WidgetPlot.setData([], [])
+            self.analysis_worker.cancel()
+            self.graph3WidgetCurve.clear()
             self.graph4WidgetPlot.setData([], [])
+            self.model.step_response = np.zeros((0, 3))
+            self.update_step_table()
 
             return
 
-        data = self.model.recorded_data
-        data = data[
-            self.model.get_frames(self.model.analyser_start) : self.model.get_frames(
-                self.model.analyser_stop
+        if self.model.recording_revision != self.analysis_cache.revision:
+            self.analysis_cache.clear(self.model.recording_revision)
+        self.analysis_worker.submit(
+            self.calculate_sink_graphs,
+            self.analysis_cache,
+            self.model.recording_revision,
+            self.model.recorded_data,
+            self.model.fs,
+            self.model.analyser_start,
+            self.model.analyser_stop,
+            self.model.analyser_window,
+            self.model.get_steps(),
+            self.model.latency if self.model.latency_compensation else 0,
+            self.model.spectrum_resolution,
+            self.graph4Widget.width(),
+        )
+
+    @staticmethod
+    def reduce_spectrum(
+        frequencies: np.ndarray,
+        magnitudes: np.ndarray,
+        fs: int,
+        resolution: str,
+        pixels: int,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        # Zero can not be shown on the logarithmic frequency axis.
+        if resolution == "full" or len(frequencies) < 2:
+            return frequencies[1:], magnitudes[1:]
+
+        if resolution == "pixel":
+            # The spectrum spans log2(bins) octaves above the first bin.
+            fraction = max(1, int(pixels / np.log2(len(frequencies))))
+        else:
+            fraction = int(resolution.split("/")[1])
+
+        return Analysis.reduce_spectrum(frequencies, magnitudes, fs, fraction)
+
+    def preview_sink_spectrum(self, start: int, stop: int):
+        """Shows an estimate of the spectrum between `start` and `stop` (in
+        ms) right away, while the selection is still being dragged."""
+        if not len(self.model.recorded_data):
+            return
+
+        latency = self.model.latency if self.model.latency_compensation else 0
+        data = Analysis.slice_interval(
+            self.model.recorded_data[latency:], self.model.fs, start, stop
+        )
+        self.graph4WidgetPlot.setData(
+            *self.reduce_spectrum(
+                *Analysis.preview_spectrum(
+                    data, self.model.fs, self.model.analyser_window
+                ),
+                self.model.fs,
+                self.model.spectrum_resolution,
+                self.graph4Widget.width(),
             )
-        ]
-        data_range = np.linspace(0, len(data) / self.model.fs, len(data))
-        data_fft = fft([s * w for s, w in zip(data, hann(len(data)), strict=True)])
-        data_fft = data_fft[: len(data_fft) // 2]
-        data_fft_range = np.linspace(0, self.model.fs // 2, len(data_fft))
+        )
+
+    @staticmethod
+    def calculate_sink_graphs(
+        cache: AnalysisCache,
+        revision: int,
+        data: np.ndarray,
+        fs: int,
+        start: int,
+        stop: int,
+        window: str,
+        steps: list[tuple[float, int, int]],
+        latency: int,
+        resolution: str,
+        pixels: int,
+    ) -> tuple[np.ndarray, ...]:
+        # Runs outside of the GUI thread, so it must not touch any widget.
+        # Dropping the latency aligns the recording with the stimulus.
+        data = data[latency:]
+        step_response = cache.get(
+            ("steps", fs, latency, tuple(steps)),
+            lambda: Analysis.step_response(data, fs, steps),
+            revision,
+        )
+        data = Analysis.slice_interval(data, fs, start, stop)
+        spectrum = cache.get(
+            ("spectrum", fs, latency, start, stop, window),
+            lambda: Analysis.windowed_spectrum(data, fs, window),
+            revision,
+        )
+        pyramid = cache.get(
+            ("pyramid", fs, latency, start, stop),
+            lambda: MinMaxPyramid(data, fs),
+            revision,
+        )
+
+        return (
+            pyramid,
+            *View.reduce_spectrum(
+                *spectrum,
+                fs,
+                resolution,
+                pixels,
+            ),
+            step_response,
+        )
+
+    def show_sink_graphs(self, result: tuple[np.ndarray, ...]):
+        pyramid, data_fft_range, data_fft, step_response = result
+
+        self.graph3WidgetCurve.set_data(pyramid)
+        self.graph4WidgetPlot.setData(data_fft_range, data_fft)
+        self.model.step_response = step_response
+        self.update_step_table()
+        self.latency_label.setText(
+            f"Latenz: {self.model.latency / self.model.fs * 1000:.1f} ms"
+        )
 
-        self.graph3WidgetPlot.setData(data_range, data)
-        self.graph4WidgetPlot.setData(data_fft_range, np.abs(data_fft) / len(data_fft))
+    def update_step_table(self):
+        response = self.model.step_response
+        self.step_table.setRowCount(len(response))
+        for row, (hertz, amplitude, phase) in enumerate(response):
+            for column, text in enumerate(
+                (f"{hertz:g}", f"{amplitude:.4g}", f"{np.degrees(phase):.1f}")
+            ):
+                self.step_table.setItem(row, column, QTableWidgetItem(text))
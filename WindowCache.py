@@ -0,0 +1,58 @@
+from functools import lru_cache
+
+import numpy as np
+
+
+class WindowCache:
+    """Process-wide cache of the window ramps used by `SingleSignalModel`.
+
+    A stepped configuration usually repeats the same window, sigma, ramp
+    length and fs for every step, so the windows are computed once and shared
+    as read-only arrays. Ramps are views into the cached window, never copies.
+    """
+
+    @staticmethod
+    def open_ramp(window: str, sigma: float, length: int, fs: int) -> np.ndarray:
+        """Rising half of the window for an opening ramp of `length` ms."""
+        return WindowCache._window(*WindowCache._key(window, sigma, length, fs))[
+            : length * fs // 1000
+        ]
+
+    @staticmethod
+    def close_ramp(window: str, sigma: float, length: int, fs: int) -> np.ndarray:
+        """Falling half of the window for a closing ramp of `length` ms."""
+        return WindowCache._window(*WindowCache._key(window, sigma, length, fs))[
+            length * fs // 1000 :
+        ]
+
+    @staticmethod
+    def info():
+        """Returns hits, misses, maxsize and currsize of the cache."""
+        return WindowCache._window.cache_info()
+
+    @staticmethod
+    def clear():
+        WindowCache._window.cache_clear()
+
+    @staticmethod
+    def _key(window: str, sigma: float, length: int, fs: int) -> tuple:
+        # Sigma only matters for Gauss, so other windows share one entry.
+        return window, (float(sigma) if "gauss" in window else None), length, fs
+
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def _window(window: str, sigma: float | None, length: int, fs: int) -> np.ndarray:
+        from scipy import signal
+
+        frames = length * fs * 2 // 1000
+        if frames <= 0:
+            data = np.zeros(0)
+        else:
+            data = signal.windows.get_window(
+                ("gauss", sigma) if sigma is not None else window,
+                frames,
+                fftbins=False,
+            )
+        data.flags.writeable = False
+
+        return data
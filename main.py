@@ -1,6 +1,10 @@
 import sys
+from time import perf_counter
+
+started = perf_counter()
 
 from Controller import Controller
+from PySide6.QtCore import QEvent, QObject
 from PySide6.QtWidgets import QApplication
 from SignalModel import SignalModel
 from SingleSignalModel import SingleSignalModel
@@ -10,15 +14,45 @@ from View import View
 class App(QApplication):
     def __init__(self, sys_argv):
         super(App, self).__init__(sys_argv)
+        # Time since the start of the process after every step of the startup,
+        # printed with `python main.py --timing`.
+        self.timings: list[tuple[str, float]] = [("Importe", perf_counter())]
         self.model = SignalModel()
         self.controller = Controller(self.model)
+        self.timings.append(("Modell und Controller", perf_counter()))
         self.view = View(self.model, self.controller)
         self.controller.set_view(self.view)
+        self.timings.append(("Fenster aufgebaut", perf_counter()))
+        self.view.installEventFilter(self)
         self.view.show()
 
+    def eventFilter(self, watched: QObject, event: QEvent) -> bool:
+        if watched is self.view and event.type() == QEvent.Type.Paint:
+            self.view.removeEventFilter(self)
+            self.timings.append(("Erstes Zeichnen", perf_counter()))
+            # Probing the devices only starts once the window is visible.
+            self.view.probe_devices(self.devices_probed)
+
+        return False
+
+    def devices_probed(self):
+        self.timings.append(("Geräte abgefragt", perf_counter()))
+        if "--timing" in self.arguments():
+            self.report_timings()
+
+    def report_timings(self, file=sys.stderr):
+        print("Start", file=file)
+        previous = started
+        for step, time in self.timings:
+            print(
+                f"  {step:<22} {(time - previous) * 1000:7.0f} ms"
+                f"  (gesamt {(time - started) * 1000:5.0f} ms)",
+                file=file,
+            )
+            previous = time
+
 
 if __name__ == "__main__":
     app = App(sys.argv)
-    main = View(app.model, app.controller)
 
     app.exec()